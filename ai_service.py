@@ -1,7 +1,11 @@
 import os
 import google.generativeai as genai
 import json
+import base64
 import logging
+from session_context import SessionContext
+from voice_activity import voice_activity
+from transcript_filter import transcript_filter
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -107,40 +111,40 @@ class AIService:
         
         if not self.model:
             logger.error("CRITICAL: Could not initialize ANY Gemini model.")
-        
-        # Store context for consistent language responses
-        self.last_detected_language = None
-        self.incident_memory = None # Stores {type, priority, timestamp}
 
 
-    def process_audio(self, audio_data_base64):
+    def process_audio(self, audio_data, context=None):
         """
         Sends audio to Gemini and returns the JSON analysis.
         Args:
-            audio_data_base64 (str): Base64 encoded audio data (WebM/WAV).
+            audio_data (bytes): Raw audio (WebM/WAV). A base64 string from older clients is also accepted.
+            context (SessionContext): The caller's language/incident memory. Without one, no memory is used or kept.
         """
+        if context is None:
+            context = SessionContext()
         if not self.model:
             return {"error": "AI Service not configured"}
 
         try:
             # Skip if audio chunk is too small (likely silence or noise)
-            import base64
-            import math
-            import struct
-            
-            audio_bytes = base64.b64decode(audio_data_base64)
+            if isinstance(audio_data, str):
+                audio_data = base64.b64decode(audio_data) # Compatibility: older clients send base64 text
+            audio_view = memoryview(audio_data)
             
             # 1. Size Check: Too small = silence
-            if len(audio_bytes) < 5000:  # Increased to 5KB for better silence filtering
+            if audio_view.nbytes < 5000:  # Increased to 5KB for better silence filtering
                 logger.info("Skipping small audio chunk (size < 5KB)")
                 return {"transcription": "", "priority": "P4", "skip": True}
 
-            # 2. RMS Amplitude Check (Server-side VAD)
-            # WebM encoding makes raw PCM parsing complex without external libraries.
-            # We rely on the AI's "detected_language" filter to catch silence/noise.
+            # 2. Server-side VAD: decode locally and skip silence/noise before the model round trip.
+            # Undecodable chunks pass through; the AI's "detected_language" filter still catches the rest.
+            vad = voice_activity.check(audio_view)
+            if vad["speech"] is False:
+                logger.info(f"Skipping non-speech audio chunk (speech probability {vad['probability']}, {vad['ms']} ms)")
+                return {"transcription": "", "priority": "P4", "skip": True}
 
             # Send to Gemini with timeout handling
-            logger.info(f"Processing audio chunk ({len(audio_bytes)} bytes)...")
+            logger.info(f"Processing audio chunk ({audio_view.nbytes} bytes)...")
             
             # Construct prompt with language context
             prompt_parts = []
@@ -149,15 +153,16 @@ class AIService:
             prompt_parts.append("ROLE: You are a PASSIVE TRANSCRIPTIONIST. Your job is ONLY to transcribe what the USER says.\nINSTRUCTION: If the audio contains only SILENCE, BACKGROUND NOISE, HEAVY BREATHING, or STATIC, return 'detected_language': 'Unknown' and empty 'transcription'.\nCRITICAL: Do NOT hallucinate. Do NOT generate questions like 'Address sollunga'. Do NOT complete sentences. If no speech, return empty.")
 
             # --- CONTEXT INJECTION (Memory) ---
-            if self.last_detected_language and self.last_detected_language != "English":
-                prompt_parts.append(f"Language Context: The user previously spoke in {self.last_detected_language}. Please provide 'suggested_response_native' in {self.last_detected_language} if appropriate.")
+            if context.last_detected_language and context.last_detected_language != "English":
+                prompt_parts.append(f"Language Context: The user previously spoke in {context.last_detected_language}. Please provide 'suggested_response_native' in {context.last_detected_language} if appropriate.")
             
-            if self.incident_memory:
-                 prompt_parts.append(f"INCIDENT HISTORY: The user previously reported a '{self.incident_memory.get('type')}' (Priority: {self.incident_memory.get('priority')}).\n"
-                                     f"INSTRUCTION: If the user is now providing details (like location/address) for this SAME incident, MAINTAIN the Priority '{self.incident_memory.get('priority')}' and Type '{self.incident_memory.get('type')}'. "
+            if context.incident_memory:
+                 prompt_parts.append(f"INCIDENT HISTORY: The user previously reported a '{context.incident_memory.get('type')}' (Priority: {context.incident_memory.get('priority')}).\n"
+                                     f"INSTRUCTION: If the user is now providing details (like location/address) for this SAME incident, MAINTAIN the Priority '{context.incident_memory.get('priority')}' and Type '{context.incident_memory.get('type')}'. "
                                      f"Merge the new info. Do NOT downgrade to 'Information/P4' if it clearly relates to the previous accident.")
 
-            prompt_parts.append({"mime_type": "audio/webm", "data": audio_data_base64})
+            # Raw bytes go to Gemini as inline data (no base64 round trip)
+            prompt_parts.append({"mime_type": "audio/webm", "data": audio_data if isinstance(audio_data, bytes) else audio_view.tobytes()})
 
             # Generate content with strict parameters
             generation_config = {
@@ -178,10 +183,10 @@ class AIService:
                 logger.info("AI detected silence/unknown language. Skipping.")
                 return {"transcription": "", "priority": "P4", "skip": True}
 
-            # 2. Block Known Hallucinations (Blacklist)
-            hallucination_blacklist = ["siri", "google", "alexa", "copyright", "address sollunga", "vaanga sir", "enna problem", "hello", "test", "mic check"]
-            if any(h in transcription.lower() for h in hallucination_blacklist):
-                logger.info(f"Blocked hallucination: '{transcription}'")
+            # 2. Block Known Hallucinations (rules in transcript_filters.json)
+            blocked = transcript_filter.match(transcription, detected)
+            if blocked:
+                logger.info(f"Blocked hallucination: '{transcription}' (rule {blocked['rule']}: '{blocked['phrase']}')")
                 return {"transcription": "", "priority": "P4", "skip": True}
 
             # 3. Block tiny "breath" transcriptions (< 3 chars)
@@ -190,17 +195,17 @@ class AIService:
                  return {"transcription": "", "priority": "P4", "skip": True}
 
             if detected and detected != "Unknown":
-                self.last_detected_language = detected
+                context.last_detected_language = detected
                 logger.info(f"Language context updated to: {detected}")
 
             # Update Memory if meaningful incident
             p_val = result.get('priority', 'P4')
             if p_val in ['P1', 'P2']:
-                self.incident_memory = {
+                context.incident_memory = {
                     "type": result.get('type'),
                     "priority": p_val
                 }
-                logger.info(f"Updated Incident Memory: {self.incident_memory}")
+                logger.info(f"Updated Incident Memory: {context.incident_memory}")
 
             logger.info(f"AI Response received: {result.get('priority', 'N/A')} | Lang: {detected}")
             return result
@@ -2,22 +2,41 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-import json
+import base64
 import logging
-import gspread
 import re
-from dateutil.parser import parse as parse_date, ParserError
-from google.oauth2.service_account import Credentials
+import uuid
+import threading
 from flask import Flask, jsonify, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired
 from collections import Counter
-import Levenshtein
+import numpy as np
 import gunicorn
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from ai_service import ai_service # Custom AI Service for RAPID-100
+from session_context import session_contexts
+from audio_pipeline import AudioPipeline
+from voice_activity import voice_activity
+from transcript_filter import transcript_filter
+from sheet_cache import sheet_cache
+from sheet_sync import IncrementalSheetSync, accumulate
+from incident_store import incident_store, dispatch_ref
+from station_resolver import StationResolver
+from geocoder import Geocoder
+from subdivision_locator import subdivision_locator
+from boundary_bundle import boundary_bundle
+from http_cache import encoded_for, derived_etag, not_modified, send_payload, send_json
+from date_normalizer import date_normalizer
+from sheet_schema import schema_for, numericise
+from write_behind import WriteBehindQueue
+from sheets_client import sheets, is_rejection
+from prefetch import SheetPrefetcher
+from data_query import QUERY_PARAMS, index_for, parse_query, run_query
+from rollups import rollup_for
+from spatial_index import grid_for, bin_points, cells_to_response, clamp_zoom
 
 # --- Logging Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -84,31 +103,12 @@ SDO_ABBREVIATION_MAP = {
 
 SDO_FULL_NAME_MAP = { "Vilathikulam": "Vilathikulam", "Sathankulam": "Sathankulam", "Thoothukudi Rural": "Thoothukudi Rural", "Maniyachi": "Maniyachi", "Tiruchendur": "Tiruchendur", "Kovilpatti": "Kovilpatti", "Thoothukudi Town": "Thoothukudi Town", "Srivaikundam": "Srivaikundam", "Tut Rural": "Thoothukudi Rural"}
 
-EVENT_TYPE_GROUPS = { "Fighting / Threatening": ["Fighting", "Fight", "Threatening", "Drunken Brawl"], "Family Dispute": ["Family Dispute", "Family Fighting"], "Road Accident": ["Road Accident"], "Fire Accident": ["Fire Accident", "Fire"], "Woman & Child Related": ["Woman and child Related", "Woman Related", "Child Related"], "Theft / Robbery": ["Theft", "Robbery", "Robbrey-theft"], "Civil Dispute": ["Civil Dispute", "Encroachment"], "Complaint Against Police": ["Complaint Against Police"], "Prohibition Related": ["Prohibition"], "Others": ["Others", "Disturbance", "Cheating", "Missing Person", "Cyber Crime", "Rescue Works"] }
+# Memoized station matching over MASTER_STATION_LIST; aliases learned in earlier runs are reloaded
+station_resolver = StationResolver(PS_ALIAS_MAP, MASTER_STATION_LIST, SDO_ABBREVIATION_MAP)
+station_resolver.load(incident_store.load_station_aliases())
+geocoder = Geocoder(GOOGLE_MAPS_API_KEY, incident_store)
 
-# --- Google Sheets Client ---
-gc = None
-def get_gspread_client():
-    global gc
-    if gc is None:
-        try:
-            # FULL ACCESS required for writing
-            scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-            if 'GSPREAD_SERVICE_ACCOUNT' in os.environ:
-                creds_json = json.loads(os.environ['GSPREAD_SERVICE_ACCOUNT'])
-                creds = Credentials.from_service_account_info(creds_json, scopes=scopes)
-                logging.info("Successfully authenticated with Google Sheets from environment variable.")
-            else:
-                creds = Credentials.from_service_account_file('credentials.json', scopes=scopes)
-                logging.info("Successfully authenticated with Google Sheets from credentials.json file.")
-            gc = gspread.authorize(creds)
-        except FileNotFoundError:
-            logging.error("CRITICAL: 'credentials.json' file not found and GSPREAD_SERVICE_ACCOUNT env var not set. Cannot connect to Google Sheets.")
-            gc = "ERROR"
-        except Exception as e:
-            logging.error(f"Failed to authenticate with Google Sheets: {e}")
-            gc = "ERROR"
-    return gc if gc != "ERROR" else None
+EVENT_TYPE_GROUPS = { "Fighting / Threatening": ["Fighting", "Fight", "Threatening", "Drunken Brawl"], "Family Dispute": ["Family Dispute", "Family Fighting"], "Road Accident": ["Road Accident"], "Fire Accident": ["Fire Accident", "Fire"], "Woman & Child Related": ["Woman and child Related", "Woman Related", "Child Related"], "Theft / Robbery": ["Theft", "Robbery", "Robbrey-theft"], "Civil Dispute": ["Civil Dispute", "Encroachment"], "Complaint Against Police": ["Complaint Against Police"], "Prohibition Related": ["Prohibition"], "Others": ["Others", "Disturbance", "Cheating", "Missing Person", "Cyber Crime", "Rescue Works"] }
 
 # --- Data Cleaning & Standardization Functions ---
 def clean_event_type(messy_type):
@@ -119,44 +119,25 @@ def clean_event_type(messy_type):
             if keyword.lower() in messy_type_lower: return clean_category
     return "Others"
 
-def find_best_match_levenshtein(key, master_list, threshold=80):
-    if not key: return None
-    best_match, min_distance = None, float('inf')
-    for master_item in master_list:
-        distance = Levenshtein.distance(key, master_item.lower())
-        if distance < min_distance:
-            min_distance, best_match = distance, master_item
-    if best_match:
-        max_len = max(len(key), len(best_match))
-        if max_len == 0: return best_match
-        similarity = (1 - (min_distance / max_len)) * 100
-        if similarity >= threshold: return best_match
-    return None
-
 def standardize_police_station(messy_station, sdo_fallback=None):
-    if not messy_station: return None
-    key = str(messy_station).lower().replace('.', '').replace('ps', '').strip()
-    exact_match = PS_ALIAS_MAP.get(key)
-    if exact_match: return exact_match
-    fuzzy_match = find_best_match_levenshtein(key, MASTER_STATION_LIST)
-    if fuzzy_match: return fuzzy_match
-    if sdo_fallback and SDO_ABBREVIATION_MAP.get(key.upper()) == sdo_fallback:
-        return sdo_fallback.lower().replace(" ", "")
-    return None
-
-def get_lat_lon(row):
+    return station_resolver.resolve(messy_station, sdo_fallback)
+
+COORD_PATTERN = r'[+-]?\d+\.\d+'
+COORD_RE = re.compile(COORD_PATTERN)
+COORD_PAIR_RE = re.compile(f'({COORD_PATTERN})')
+
+def get_lat_lon(row, schema):
+    """Coordinates from the latitude/longitude columns bound in `schema` (None, None if invalid)."""
     lat_str, lon_str = None, None
-    lat_key = next((k for k in row if 'lat' in str(k).lower()), None)
-    lon_key = next((k for k in row if 'lon' in str(k).lower() or 'long' in str(k).lower()), None)
-    if lat_key:
-        potential_val = str(row.get(lat_key, '')).strip()
-        found_coords = re.findall(r'([+-]?\d+\.\d+)', potential_val)
+    if schema.lat is not None:
+        potential_val = str(schema.value(row, schema.lat)).strip()
+        found_coords = COORD_PAIR_RE.findall(potential_val)
         if len(found_coords) >= 2: lat_str, lon_str = found_coords[0], found_coords[1]
-    if not (lat_str and lon_str) and lat_key and lon_key:
-        lat_str, lon_str = str(row.get(lat_key, '')).strip(), str(row.get(lon_key, '')).strip()
+        if not (lat_str and lon_str) and schema.lon is not None:
+            lat_str, lon_str = potential_val, str(schema.value(row, schema.lon)).strip()
     if not (lat_str and lon_str): return None, None
     try:
-        lat_match, lon_match = re.search(r'[+-]?\d+\.\d+', lat_str), re.search(r'[+-]?\d+\.\d+', lon_str)
+        lat_match, lon_match = COORD_RE.search(lat_str), COORD_RE.search(lon_str)
         if not (lat_match and lon_match): return None, None
         lat, lon = float(lat_match.group(0)), float(lon_match.group(0))
     except (ValueError, TypeError): return None, None
@@ -165,114 +146,253 @@ def get_lat_lon(row):
     return None, None
 
 def standardize_date(date_string):
-    if not date_string: return None
-    date_str_cleaned = str(date_string).strip().lower()
-    if date_str_cleaned in ['between', 'after', 'before']: return None
-    match = re.search(r'\d{1,2}[\.\/-]\d{1,2}[\.\/-]\d{2,4}', date_str_cleaned)
-    date_to_parse = match.group(0) if match else date_str_cleaned
-    try: return parse_date(date_to_parse, dayfirst=True, fuzzy=False).strftime('%Y-%m-%d')
-    except (ValueError, TypeError, ParserError):
-        try: return parse_date(date_to_parse, dayfirst=True, fuzzy=True).strftime('%Y-%m-%d')
-        except (ValueError, TypeError, ParserError): return None
+    return date_normalizer.normalize(date_string)
 
 # --- Data Fetching and Processing ---
-def robust_fetch_from_sheet(gc_client, workbook_name, sheet_name):
+def robust_fetch_from_sheet(workbook_name, sheet_name):
+    """Returns (header, rows) as plain value lists; ([], []) for an empty tab. Sheets errors propagate to the cache loader."""
     logging.info(f"Fetching data for '{sheet_name}' from '{workbook_name}'...")
-    try:
-        spreadsheet = gc_client.open(workbook_name)
-        worksheet = spreadsheet.worksheet(sheet_name)
-        return worksheet.get_all_records(head=2) if sheet_name == TAB_100_CALLS else worksheet.get_all_records()
-    except Exception as e:
-        logging.error(f"Error fetching '{sheet_name}': {e}", exc_info=True)
-        return []
+    head = 2 if sheet_name == TAB_100_CALLS else 1
+    values = sheets.call(workbook_name, sheet_name, lambda ws: ws.get_all_values())
+    if len(values) < head: return [], []
+    return values[head - 1], values[head:]
 
 def get_date_range(data):
     dates = [item['Date'] for item in data if item.get('Date')]
     return (min(dates), max(dates)) if dates else (None, None)
 
-def process_records(records, record_type):
+def process_records(header, rows, record_type, first_row_num=3):
+    """Cleans raw sheet rows (value lists under `header`). The header is resolved to column positions once."""
+    schema = schema_for(header)
+    clean = process_records_batch if BATCH_CLEANING_MIN_ROWS and len(rows) >= BATCH_CLEANING_MIN_ROWS else process_records_rowwise
+    processed_data, counters = clean(schema, rows, record_type, first_row_num)
+    logging.info(f"--- Processing Report for {record_type.upper()} ---")
+    logging.info(f"Total Rows Read: {len(rows)}")
+    for reason, count in sorted(counters.items()):
+        logging.info(f"{reason.replace('_', ' ').title()}: {count}")
+    logging.info("-------------------------------------------")
+    return processed_data
+
+def process_records_rowwise(schema, rows, record_type, first_row_num=3):
     processed_data, counters = [], Counter()
-    for i, row in enumerate(records):
-        original_row = dict(row)
-        if not any(str(val).strip() for val in original_row.values()):
+    for i, row in enumerate(rows):
+        row = schema.pad(row)
+        if schema.is_empty(row):
             counters['skipped_empty_row'] += 1
             continue
-        row_num = i + 3
-        lat, lon = get_lat_lon(original_row)
+        row_num = i + first_row_num
+        lat, lon = get_lat_lon(row, schema)
         if lat is None or lon is None:
-            skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Invalid Coordinates | DATA: {original_row}")
+            skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Invalid Coordinates | DATA: {schema.record(row)}")
             counters['skipped_for_coords'] += 1
             continue
-        date_val = original_row.get('Date') or original_row.get('Occurance Mon') or original_row.get('DescriptionE')
-        standard_date = standardize_date(date_val)
+        standard_date = standardize_date(schema.first(row, 'date'))
         if not standard_date and record_type in ['100_calls', 'robbery_theft', 'pocso']:
-             skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Invalid Date | DATA: {original_row}")
+             skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Invalid Date | DATA: {schema.record(row)}")
              counters['skipped_for_date'] += 1
              continue
         subdivision, station_key, station_name_from_row, sdo_key_from_row = None, None, None, None
         if record_type in ['100_calls', 'robbery_theft']:
-            station_name_from_row = original_row.get('Police Station') or original_row.get('Station')
-            sdo_key_from_row = str(original_row.get('SDOs','')).strip()
+            station_name_from_row = schema.first(row, 'station')
+            sdo_key_from_row = str(schema.get(row, 'sdos', '')).strip()
             sdo_fullname_fallback = SDO_ABBREVIATION_MAP.get(sdo_key_from_row.upper())
             station_key = standardize_police_station(station_name_from_row, sdo_fullname_fallback)
             subdivision = PS_TO_SUBDIVISION_MAP.get(station_key)
         elif record_type in ['hurt', 'pocso', 'cctv']:
-            sdo_key_from_row = str(original_row.get('SDO') or original_row.get('SDOs','') or '').strip()
-            cleaned_sdo_key = re.sub(r'^\d+\.\s*', '', sdo_key_from_row).upper()
-            subdivision = SDO_ABBREVIATION_MAP.get(cleaned_sdo_key)
-            if not subdivision:
-                subdivision = SDO_FULL_NAME_MAP.get(sdo_key_from_row.title())
+            sdo_key_from_row = str(schema.first(row, 'sdo') or '').strip()
+            subdivision = map_sdo_key(sdo_key_from_row)
+        if not subdivision:
+            # Names did not map: use the boundary polygon the coordinates fall in
+            subdivision = subdivision_locator.locate(lat, lon)
+            if subdivision: counters['subdivision_from_coordinates'] += 1
         if not subdivision:
             # FIX: For 100_calls (AI dispatched), use default instead of skipping
             if record_type == '100_calls':
                 subdivision = "Thoothukudi Town" 
             else:
-                skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Unmapped Station/SDO '{station_name_from_row or sdo_key_from_row}' | DATA: {original_row}")
+                skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Unmapped Station/SDO '{station_name_from_row or sdo_key_from_row}' | DATA: {schema.record(row)}")
                 counters['skipped_for_mapping'] += 1
                 continue
         clean_row = {'Latitude': lat, 'Longitude': lon, 'Subdivision': subdivision, 'Date': standard_date}
         if record_type == '100_calls':
-            event_type_value = original_row.get('Event type') or original_row.get('Event type ')
-            clean_row['EventType'] = clean_event_type(event_type_value)
+            clean_row['EventType'] = clean_event_type(schema.first(row, 'event_type'))
             clean_row['PoliceStation'] = (station_key or "").title()
         elif record_type == 'robbery_theft':
             clean_row['Station'] = (station_key or "").title()
-            clean_row['CrimeType'] = str(original_row.get('Description', '')).strip()
+            clean_row['CrimeType'] = str(schema.get(row, 'description', '')).strip()
         elif record_type == 'hurt':
-            clean_row['Station'] = str(original_row.get('PS Limit', '')).strip()
-            sub_category_raw = original_row.get('Crime Type', '')
+            clean_row['Station'] = str(schema.get(row, 'ps_limit', '')).strip()
+            sub_category_raw = schema.get(row, 'crime_type', '')
             # FIX: This line now checks for both "grievous" and the typo "grevious"
             sub_category_lower = str(sub_category_raw).lower()
             clean_row['SubCategory'] = "Grievous" if 'grievous' in sub_category_lower or 'grevious' in sub_category_lower else "Simple"
         elif record_type == 'pocso':
-            description = str(original_row.get('Description - Real /Elopment', '')).lower()
+            description = str(schema.get(row, 'pocso_description', '')).lower()
             clean_row['SubCategory'] = "Elopement" if 'elopement' in description else "Real"
         elif record_type == 'cctv':
-            clean_row['Place_Name'] = original_row.get('Name of the place')
+            clean_row['Place_Name'] = schema.get(row, 'place_name')
             
         processed_data.append(clean_row)
         counters['processed_successfully'] += 1
-    logging.info(f"--- Processing Report for {record_type.upper()} ---")
-    logging.info(f"Total Rows Read: {len(records)}")
-    for reason, count in sorted(counters.items()):
-        logging.info(f"{reason.replace('_', ' ').title()}: {count}")
-    logging.info("-------------------------------------------")
-    return processed_data
+    return processed_data, counters
+
+# --- Columnar Batch Cleaning ---
+# Full-sheet loads are cleaned column-wise: empty rows, coordinates and subdivision polygons are checked with numpy
+# over whole columns, and the date/station/event lookups run once per distinct value. Same rules, output and skipped-row
+# log as process_records_rowwise, which smaller batches (incremental syncs, live dispatches) keep using.
+BATCH_CLEANING_MIN_ROWS = int(os.environ.get('BATCH_CLEANING_MIN_ROWS', 2000))
+
+def decimal_cells(cells):
+    """Float value of each plain decimal cell ('8.7912'), NaN for the rest, which need get_lat_lon's regex rules."""
+    cells = np.char.strip(np.asarray(cells, dtype=str))
+    plain = (np.char.count(cells, '.') == 1) & np.char.isdecimal(np.char.replace(cells, '.', '')) \
+        & ~np.char.startswith(cells, '.') & ~np.char.endswith(cells, '.')
+    values = np.full(len(cells), np.nan)
+    values[plain] = cells[plain].astype(float)
+    # str() switches to exponent notation outside this span, which get_lat_lon's regex reads differently
+    values[(values != 0) & ((values < 1e-4) | (values >= 1e16))] = np.nan
+    return values
+
+def batch_lat_lon(schema, rows, columns, non_empty):
+    """get_lat_lon for every row, as (lats, lons) lists; plain decimal pairs are parsed and range-checked as arrays."""
+    n = len(rows)
+    lat, lon, decided = np.full(n, np.nan), np.full(n, np.nan), ~non_empty
+    if schema.lat is None:
+        decided[:] = True
+    elif schema.lon is not None:
+        lat_cells, lon_cells = decimal_cells(columns[schema.lat]), decimal_cells(columns[schema.lon])
+        decided |= ~np.isnan(lat_cells) & ~np.isnan(lon_cells)
+        straight = (lat_cells > 8.0) & (lat_cells < 9.5) & (lon_cells > 77.5) & (lon_cells < 78.5)
+        swapped = ~straight & (lon_cells > 8.0) & (lon_cells < 9.5) & (lat_cells > 77.5) & (lat_cells < 78.5)
+        lat = np.where(straight, lat_cells, np.where(swapped, lon_cells, np.nan))
+        lon = np.where(straight, lon_cells, np.where(swapped, lat_cells, np.nan))
+    lats = [None if value != value else value for value in lat.tolist()]
+    lons = [None if value != value else value for value in lon.tolist()]
+    for i in np.flatnonzero(~decided).tolist():
+        lats[i], lons[i] = get_lat_lon(rows[i], schema)
+    return lats, lons
+
+def field_cells(schema, columns, field):
+    """Per row, the raw cells schema.first(row, field) reads, as one hashable key."""
+    return list(zip(*(columns[index] for index in schema.fields[field]))) or [()] * len(columns[0])
+
+def first_value(cells):
+    """schema.first() over already-extracted cells."""
+    value = None
+    for cell in cells:
+        value = numericise(cell)
+        if value: return value
+    return value
+
+def map_distinct(fn, keys):
+    """[fn(first_value(key)) for key in keys], calling fn once per distinct key."""
+    results = {key: fn(first_value(key)) for key in set(keys)}
+    return [results[key] for key in keys]
+
+def map_sdo_key(sdo_key):
+    """Subdivision for an SDO cell ('1. TTN', 'Tut Rural'), by abbreviation and then by full name."""
+    subdivision = SDO_ABBREVIATION_MAP.get(re.sub(r'^\d+\.\s*', '', sdo_key).upper())
+    return subdivision or SDO_FULL_NAME_MAP.get(sdo_key.title())
+
+def process_records_batch(schema, rows, record_type, first_row_num=3):
+    processed_data, counters = [], Counter()
+    if not rows: return processed_data, counters
+    rows = [schema.pad(row) for row in rows]
+    n = len(rows)
+    columns = list(zip(*rows))
+    non_empty = np.zeros(n, dtype=bool)
+    for index in schema.value_indexes:
+        pending = np.flatnonzero(~non_empty)  # Each column is only checked for rows with no value so far
+        if not len(pending): break
+        cells = np.asarray(columns[index], dtype=str)[pending]
+        non_empty[pending] = np.char.str_len(np.char.strip(cells)) > 0
+    lats, lons = batch_lat_lon(schema, rows, columns, non_empty)
+    valid = np.array([lat is not None and lon is not None for lat, lon in zip(lats, lons)], dtype=bool)
+    located = np.full(n, None, dtype=object)
+    if valid.any(): located[valid] = subdivision_locator.locate_many(np.array(lats)[valid].astype(float), np.array(lons)[valid].astype(float))
+    located = located.tolist()
+    dates = map_distinct(standardize_date, field_cells(schema, columns, 'date'))
+    if record_type in ['100_calls', 'robbery_theft']:
+        stations, resolved = field_cells(schema, columns, 'station'), {}  # Resolved lazily: fuzzy hits are learned
+    elif record_type in ['hurt', 'pocso', 'cctv']:
+        sdos = field_cells(schema, columns, 'sdo')
+        sdo_subdivisions = map_distinct(lambda sdo: map_sdo_key(str(sdo or '').strip()), sdos)
+    if record_type == '100_calls': event_types = map_distinct(clean_event_type, field_cells(schema, columns, 'event_type'))
+    for i, row in enumerate(rows):
+        if not non_empty[i]:
+            counters['skipped_empty_row'] += 1
+            continue
+        row_num = i + first_row_num
+        lat, lon = lats[i], lons[i]
+        if lat is None or lon is None:
+            skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Invalid Coordinates | DATA: {schema.record(row)}")
+            counters['skipped_for_coords'] += 1
+            continue
+        standard_date = dates[i]
+        if not standard_date and record_type in ['100_calls', 'robbery_theft', 'pocso']:
+             skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Invalid Date | DATA: {schema.record(row)}")
+             counters['skipped_for_date'] += 1
+             continue
+        subdivision, station_key, station_name_from_row, sdo_key_from_row = None, None, None, None
+        if record_type in ['100_calls', 'robbery_theft']:
+            station_name_from_row = first_value(stations[i])
+            sdo_key_from_row = str(schema.get(row, 'sdos', '')).strip()
+            key = (stations[i], sdo_key_from_row)
+            if key not in resolved:
+                resolved[key] = standardize_police_station(station_name_from_row, SDO_ABBREVIATION_MAP.get(sdo_key_from_row.upper()))
+            station_key = resolved[key]
+            subdivision = PS_TO_SUBDIVISION_MAP.get(station_key)
+        elif record_type in ['hurt', 'pocso', 'cctv']:
+            sdo_key_from_row = str(first_value(sdos[i]) or '').strip()
+            subdivision = sdo_subdivisions[i]
+        if not subdivision:
+            subdivision = located[i]
+            if subdivision: counters['subdivision_from_coordinates'] += 1
+        if not subdivision:
+            if record_type == '100_calls':
+                subdivision = "Thoothukudi Town"
+            else:
+                skipped_rows_logger.warning(f"SHEET: {record_type.upper()} | ROW: {row_num} | REASON: Unmapped Station/SDO '{station_name_from_row or sdo_key_from_row}' | DATA: {schema.record(row)}")
+                counters['skipped_for_mapping'] += 1
+                continue
+        clean_row = {'Latitude': lat, 'Longitude': lon, 'Subdivision': subdivision, 'Date': standard_date}
+        if record_type == '100_calls':
+            clean_row['EventType'] = event_types[i]
+            clean_row['PoliceStation'] = (station_key or "").title()
+        elif record_type == 'robbery_theft':
+            clean_row['Station'] = (station_key or "").title()
+            clean_row['CrimeType'] = str(schema.get(row, 'description', '')).strip()
+        elif record_type == 'hurt':
+            clean_row['Station'] = str(schema.get(row, 'ps_limit', '')).strip()
+            sub_category_lower = str(schema.get(row, 'crime_type', '')).lower()
+            clean_row['SubCategory'] = "Grievous" if 'grievous' in sub_category_lower or 'grevious' in sub_category_lower else "Simple"
+        elif record_type == 'pocso':
+            description = str(schema.get(row, 'pocso_description', '')).lower()
+            clean_row['SubCategory'] = "Elopement" if 'elopement' in description else "Real"
+        elif record_type == 'cctv':
+            clean_row['Place_Name'] = schema.get(row, 'place_name')
+        processed_data.append(clean_row)
+        counters['processed_successfully'] += 1
+    return processed_data, counters
+
+def build_100_calls_filters(acc):
+    return {"event_types": sorted(acc['event_types']), "subdivisions": sorted(acc['subdivisions']), "date_range": (acc['min_date'], acc['max_date'])}
+
+# Column layout of 100_calls_new (see headers_output.txt); submit_dispatch builds rows in this order
+DISPATCH_HEADER = ['Date', 'SL. No', 'EID. No', 'Event Received time', 'Complaint Name & Address& Phone No', 'Event type ', 'Gist', '', 'Police Station', 'Received person', 'Attended Person', 'Attended the Time', 'Attended Police Said', 'Complaint Type', 'Latitude', 'Longitude']
+DISPATCH_REF_COLUMN = schema_for(DISPATCH_HEADER).index('dispatch_ref')
+
+# 100_calls_new is append-only (rows come from submit_dispatch), so only new rows are fetched between full reconciles.
+# New dispatches are added live, keyed by their EID. No reference, until the sheet mirror brings them back.
+calls_sync = IncrementalSheetSync('100_calls', process_records, build_100_calls_filters, header_row=2,
+                                  live_key_field='dispatch_ref', default_header=DISPATCH_HEADER)
 
 def fetch_and_process_100_calls():
-    gc_client = get_gspread_client()
-    if not gc_client: return {"data": [], "filters": {}}
-    records = robust_fetch_from_sheet(gc_client, WORKBOOK_100_CALLS, TAB_100_CALLS)
-    processed_data = process_records(records, '100_calls')
-    if not processed_data: return {"data": [], "filters": {}}
-    filters = {"event_types": sorted(list(set(item.get('EventType') for item in processed_data))), "subdivisions": sorted(list(set(item['Subdivision'] for item in processed_data))), "date_range": get_date_range(processed_data)}
-    return {"data": processed_data, "filters": filters}
+    return sheets.call(WORKBOOK_100_CALLS, TAB_100_CALLS, calls_sync.sync)
 
 def fetch_and_process_robbery_theft():
-    gc_client = get_gspread_client()
-    if not gc_client: return {"data": [], "filters": {}}
-    records = robust_fetch_from_sheet(gc_client, WORKBOOK_QGIS_DATA, TAB_ROBBERY_THEFT)
-    processed_data = process_records(records, 'robbery_theft')
+    header, rows = robust_fetch_from_sheet(WORKBOOK_QGIS_DATA, TAB_ROBBERY_THEFT)
+    processed_data = process_records(header, rows, 'robbery_theft')
     if not processed_data: return {"data": [], "filters": {}}
     crime_types = sorted(list(set(item['CrimeType'] for item in processed_data if item.get('CrimeType'))))
     filters = {
@@ -283,10 +403,8 @@ def fetch_and_process_robbery_theft():
     return {"data": processed_data, "filters": filters}
     
 def fetch_and_process_hurt():
-    gc_client = get_gspread_client()
-    if not gc_client: return {"data": [], "filters": {}}
-    records = robust_fetch_from_sheet(gc_client, WORKBOOK_QGIS_DATA, TAB_HURT)
-    processed_data = process_records(records, 'hurt')
+    header, rows = robust_fetch_from_sheet(WORKBOOK_QGIS_DATA, TAB_HURT)
+    processed_data = process_records(header, rows, 'hurt')
     if not processed_data: return {"data": [], "filters": {}}
     filters = {
         "subdivisions": sorted(list(set(item['Subdivision'] for item in processed_data)))
@@ -294,19 +412,15 @@ def fetch_and_process_hurt():
     return {"data": processed_data, "filters": filters}
 
 def fetch_and_process_pocso():
-    gc_client = get_gspread_client()
-    if not gc_client: return {"data": [], "filters": {}}
-    records = robust_fetch_from_sheet(gc_client, WORKBOOK_QGIS_DATA, TAB_POCSO)
-    processed_data = process_records(records, 'pocso')
+    header, rows = robust_fetch_from_sheet(WORKBOOK_QGIS_DATA, TAB_POCSO)
+    processed_data = process_records(header, rows, 'pocso')
     if not processed_data: return {"data": [], "filters": {}}
     filters = {"subdivisions": sorted(list(set(item['Subdivision'] for item in processed_data)))}
     return {"data": processed_data, "filters": filters}
 
 def fetch_and_process_cctv():
-    gc_client = get_gspread_client()
-    if not gc_client: return {"data": [], "filters": {}}
-    records = robust_fetch_from_sheet(gc_client, WORKBOOK_QGIS_DATA, TAB_CCTV)
-    processed_data = process_records(records, 'cctv')
+    header, rows = robust_fetch_from_sheet(WORKBOOK_QGIS_DATA, TAB_CCTV)
+    processed_data = process_records(header, rows, 'cctv')
     if not processed_data: return {"data": [], "filters": {}}
     filters = {"subdivisions": sorted(list(set(item['Subdivision'] for item in processed_data)))}
     return {"data": processed_data, "filters": filters}
@@ -319,6 +433,97 @@ SHEET_FETCHER_MAP = {
     TAB_CCTV: fetch_and_process_cctv,
 }
 
+def load_sheet(sheet_name):
+    """
+    Cache loader: fetches from Sheets and persists to the local store.
+    Raises if Sheets fails, and the cache keeps serving its copy (seeded from the store on cold start).
+    A tab that is genuinely empty is an ordinary result: it is cached and stored like any other.
+    """
+    payload = SHEET_FETCHER_MAP[sheet_name]()
+    incident_store.save_sheet(sheet_name, payload)
+    return payload
+
+def seed_from_store(sheet_name):
+    if sheet_cache.peek(sheet_name) is None:
+        stored = incident_store.load_sheet(sheet_name)
+        if stored:
+            sheet_cache.seed(sheet_name, stored)
+
+def get_sheet_payload(sheet_name, force_refresh=False):
+    # Cold start: serve the local store copy at once and let the cache refresh it from Sheets in the background.
+    # Seeded for forced refreshes too, so a failed refresh falls back to the store copy instead of an error.
+    seed_from_store(sheet_name)
+    return sheet_cache.get(sheet_name, lambda: load_sheet(sheet_name), force_refresh=force_refresh)
+
+def prefetch_sheet(sheet_name):
+    """Prefetcher job: raises if Sheets failed (a store copy keeps serving, but is not 'ready')."""
+    seed_from_store(sheet_name)
+    sheet_cache.refresh(sheet_name, lambda: load_sheet(sheet_name))
+
+# Warm all tabs concurrently at boot and keep them fresh on a schedule
+sheet_prefetcher = SheetPrefetcher(SHEET_FETCHER_MAP.keys(), prefetch_sheet, lambda name: sheet_cache.peek(name) is not None)
+sheet_prefetcher.start()
+
+def append_dispatch_rows(rows, verify=False):
+    """
+    Flush function for the write-behind queue: one append_rows call per batch.
+    With `verify` (the previous attempt may have landed), rows whose EID. No reference is already in the sheet are skipped.
+    """
+    if verify:
+        present = set(sheets.call(WORKBOOK_100_CALLS, TAB_100_CALLS, lambda ws: ws.col_values(DISPATCH_REF_COLUMN + 1)))
+        remaining = [row for row in rows if not row[DISPATCH_REF_COLUMN] or row[DISPATCH_REF_COLUMN] not in present]
+        if len(remaining) < len(rows):
+            logging.warning(f"{len(rows) - len(remaining)} dispatch row(s) were already in the sheet; not appending them again.")
+        rows = remaining
+        if not rows:
+            return
+    sheets.call(WORKBOOK_100_CALLS, TAB_100_CALLS, lambda ws: ws.append_rows(rows), idempotent=False)
+
+dispatch_queue = WriteBehindQueue(incident_store, append_dispatch_rows, is_rejection_fn=is_rejection)
+dispatch_queue.start()
+
+# Socket.IO room joined by open dashboards
+DASHBOARD_ROOM = "dashboard"
+publish_lock = threading.Lock()  # Publishes read-modify-write the cached payload
+
+def publish_dispatch(dispatch_id, sheet_row):
+    """
+    Adds a just-saved dispatch to the cached 100_calls dataset and pushes the cleaned record to open dashboards,
+    so they don't have to wait for the sheet mirror and the next sync.
+    """
+    try:
+        with publish_lock:
+            records, entry = _patch_live_dispatch(dispatch_id, sheet_row)
+        if not records: return
+        socketio.emit('new_incident', {"sheet": TAB_100_CALLS, "version": entry.version, "records": records,
+                                       "filters": entry.value["filters"]}, to=DASHBOARD_ROOM)
+        logging.info(f"Dispatch {dispatch_id} pushed to dashboards ({TAB_100_CALLS} version {entry.version}).")
+    except Exception as e:
+        logging.error(f"Could not publish dispatch {dispatch_id}: {e}", exc_info=True)
+
+def _patch_live_dispatch(dispatch_id, sheet_row):
+    """
+    Adds the dispatch to calls_sync and the cache; returns (records, cache entry).
+    The entry may be a newer sync than the patch (it already holds the record, as calls_sync added it first).
+    """
+    records, payload = calls_sync.add_live(dispatch_ref(dispatch_id), sheet_row)
+    if not records:
+        logging.warning(f"Dispatch {dispatch_id} was rejected by cleaning; not pushed to dashboards.")
+        return records, None
+    if payload is None:
+        # Sheets not synced yet: extend the copy being served (local store seed, if any) rather than replace it
+        seed_from_store(TAB_100_CALLS)
+        entry = sheet_cache.peek(TAB_100_CALLS)
+        current = entry.value if entry else {"data": [], "filters": {}}
+        filters = current.get("filters") or {}
+        min_date, max_date = filters.get("date_range") or (None, None)
+        acc = {"event_types": set(filters.get("event_types", [])), "subdivisions": set(filters.get("subdivisions", [])),
+               "min_date": min_date, "max_date": max_date}
+        accumulate(acc, records)
+        payload = {"data": current.get("data", []) + records, "filters": build_100_calls_filters(acc)}
+    # A new version, so the query index, rollups, cluster grid and encoded bodies catch up on next use
+    return records, sheet_cache.patch(TAB_100_CALLS, payload)
+
 # --- Flask Routes ---
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -341,7 +546,16 @@ def logout():
 @app.route('/')
 @login_required
 def dashboard():
-    return render_template('index.html', GOOGLE_MAPS_API_KEY=GOOGLE_MAPS_API_KEY)
+    return render_template('index.html', GOOGLE_MAPS_API_KEY=GOOGLE_MAPS_API_KEY,
+                           BOUNDARY_BUNDLE_URL=url_for('boundaries', v=boundary_bundle.version))
+
+@app.route('/api/boundaries')
+def boundaries():
+    """All subdivision boundaries in one pre-simplified bundle (no login, like the static GeoJSON it replaces)."""
+    if request.args.get('v') == boundary_bundle.version:
+        # Versioned URL: the content behind it never changes
+        return send_payload(boundary_bundle.encoded, cache_control={"public": True, "max_age": 31536000, "immutable": True})
+    return send_payload(boundary_bundle.encoded, cache_control={"public": True, "no_cache": True})
 
 @app.route('/api/data/<sheet_name>')
 @login_required
@@ -349,14 +563,87 @@ def get_sheet_data(sheet_name):
     fetcher_function = SHEET_FETCHER_MAP.get(sheet_name)
     if fetcher_function:
         try:
-            data = fetcher_function()
-            return jsonify(data)
+            force_refresh = request.args.get('refresh') == '1'
+            data = get_sheet_payload(sheet_name, force_refresh=force_refresh)
+            entry = sheet_cache.peek(sheet_name)
+            version, data = (entry.version, entry.value) if entry else (0, data)
+            if any(param in request.args for param in QUERY_PARAMS):
+                try:
+                    query = parse_query(request.args)
+                except ValueError as e:
+                    return jsonify({"error": f"Invalid query: {e}"}), 400
+                # The full dataset is only serialised when it is the response body
+                etag = derived_etag(sheet_name, version)
+                cached = not_modified(etag)
+                if cached: return cached
+                index = index_for(sheet_name, version, data.get("data", []))
+                return send_json(run_query(index, data.get("filters", {}), **query), etag)
+            return send_payload(encoded_for(sheet_name, version, data))
         except Exception as e:
             logging.error(f"Error during on-demand fetch for {sheet_name}: {e}", exc_info=True)
             return jsonify({"error": f"Failed to fetch data for {sheet_name}"}), 500
     else:
         return jsonify({"error": f"Invalid sheet name: {sheet_name}"}), 404
 
+@app.route('/api/aggregate/<sheet_name>')
+@login_required
+def get_sheet_aggregate(sheet_name):
+    """Counts per subdivision / type / sub-category / day, answered from the rollup cube."""
+    if sheet_name not in SHEET_FETCHER_MAP:
+        return jsonify({"error": f"Invalid sheet name: {sheet_name}"}), 404
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+    try:
+        data = get_sheet_payload(sheet_name)
+        entry = sheet_cache.peek(sheet_name)
+        version, data = (entry.version, entry.value) if entry else (0, data)
+        etag = derived_etag(sheet_name, version)
+        cached = not_modified(etag)
+        if cached: return cached
+        cube = rollup_for(sheet_name, version, data.get("data", []))
+        return send_json(cube.query(query["date_from"], query["date_to"], query["subdivisions"], query["types"], query["sub_categories"]), etag)
+    except Exception as e:
+        logging.error(f"Error aggregating {sheet_name}: {e}", exc_info=True)
+        return jsonify({"error": f"Failed to aggregate {sheet_name}"}), 500
+
+@app.route('/api/clusters/<sheet_name>')
+@login_required
+def get_sheet_clusters(sheet_name):
+    """Pre-clustered map markers for the visible bbox at the requested zoom."""
+    if sheet_name not in SHEET_FETCHER_MAP:
+        return jsonify({"error": f"Invalid sheet name: {sheet_name}"}), 404
+    try:
+        query = parse_query(request.args)
+        zoom = clamp_zoom(request.args['zoom'])
+        if not query["bbox"]: raise ValueError("bbox is required")
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+    try:
+        data = get_sheet_payload(sheet_name)
+        entry = sheet_cache.peek(sheet_name)
+        version, data = (entry.version, entry.value) if entry else (0, data)
+        etag = derived_etag(sheet_name, version)
+        cached = not_modified(etag)
+        if cached: return cached
+        rows = data.get("data", [])
+        filter_keys = ("date_from", "date_to", "subdivisions", "types", "sub_categories")
+        if all(query[k] is None for k in filter_keys):
+            return send_json(grid_for(sheet_name, version, rows).clusters(query["bbox"], zoom), etag)
+        # Filtered view: cluster only the matching rows inside the bbox
+        positions = index_for(sheet_name, version, rows).match(bbox=query["bbox"], **{k: query[k] for k in filter_keys})
+        return send_json(cells_to_response(rows, bin_points(rows, positions, zoom), zoom), etag)
+    except Exception as e:
+        logging.error(f"Error clustering {sheet_name}: {e}", exc_info=True)
+        return jsonify({"error": f"Failed to cluster {sheet_name}"}), 500
+
+@app.route('/readyz')
+def readiness():
+    """Readiness probe: 200 once every sheet has been loaded from Sheets (an empty tab counts)."""
+    status = sheet_prefetcher.status()
+    return jsonify(status), (200 if status["ready"] else 503)
+
 @app.route('/dispatch')
 @login_required
 def dispatch_console():
@@ -367,7 +654,7 @@ def dispatch_console():
 @login_required
 def submit_dispatch():
     """
-    Receives dispatch data, geocodes it, and saves to Google Sheet.
+    Receives dispatch data, geocodes it, saves it to the local store and mirrors it to Google Sheet.
     """
     try:
         data = request.json
@@ -377,59 +664,16 @@ def submit_dispatch():
         # Default: Thoothukudi Center
         lat, lon = "8.7642", "78.1348" 
         
-        # Local Fallback Map (for when API key is missing/fails)
-        KNOWN_LOCATIONS = {
-            "chennai": ("13.0827", "80.2707"),
-            "madurai": ("9.9252", "78.1198"),
-            "kovilpatti": ("9.1725", "77.8697"),
-            "tirunelveli": ("8.7139", "77.7567"),
-            "delhi": ("28.7041", "77.1025"),
-            "mumbai": ("19.0760", "72.8777"),
-            "coimbatore": ("11.0168", "76.9558"),
-            "bengaluru": ("12.9716", "77.5946")
-        }
-
         # Priority of fields to check for location info
         search_texts = [
             data.get('landmark'),
             data.get('location_raw'),
             data.get('transcription') # Fallback to full text
         ]
-        
-        found_locally = False
-        # 1. Check Local Map against ALL possible text fields
-        for text in search_texts:
-            if not text: continue
-            text_lower = str(text).lower()
-            for city, coords in KNOWN_LOCATIONS.items():
-                if city in text_lower:
-                    lat, lon = coords
-                    logging.info(f"Geocoding (Local): Found known city '{city}' in text '{text}' -> {lat}, {lon}")
-                    found_locally = True
-                    break
-            if found_locally: break
-        
-        location_query = data.get('landmark') or data.get('location_raw')
-        
-        if location_query and not found_locally:
-            # Try Google API if not found locally
-            if GOOGLE_MAPS_API_KEY and "YOUR_GOOGLE_MAPS_API_KEY" not in GOOGLE_MAPS_API_KEY:
-                try:
-                    import requests
-                    # Append 'Tamil Nadu' for context, but allow other districts/cities
-                    query = f"{location_query}, Tamil Nadu, India"
-                    url = f"https://maps.googleapis.com/maps/api/geocode/json?address={query}&key={GOOGLE_MAPS_API_KEY}"
-                    response = requests.get(url)
-                    if response.status_code == 200:
-                        geo_data = response.json()
-                        if geo_data['results']:
-                            loc = geo_data['results'][0]['geometry']['location']
-                            lat, lon = str(loc['lat']), str(loc['lng'])
-                            logging.info(f"Geocoding (API): '{location_query}' to {lat}, {lon}")
-                        else:
-                            logging.warning(f"Geocoding (API): No results for {query}")
-                except Exception as e:
-                    logging.error(f"Geocoding (API) Error: {e}")
+        location = geocoder.locate(search_texts, remote_query=data.get('landmark') or data.get('location_raw'))
+        if location:
+            lat, lon, _ = location
+        data['subdivision'] = subdivision_locator.locate(float(lat), float(lon))
 
         # 2. Prepare Row Data
         from datetime import datetime
@@ -437,13 +681,11 @@ def submit_dispatch():
         date_str = now.strftime("%d-%m-%Y")
         time_str = now.strftime("%H:%M:%S")
 
-        # Column Mapping (Based on headers_output.txt)
-        # ['Date', 'SL. No', 'EID. No', 'Event Received time', 'Complaint Name & Address& Phone No', 'Event type ', 'Gist', '', 'Police Station', 'Received person', 'Attended Person', 'Attended the Time', 'Attended Police Said', 'Complaint Type', 'Latitude', 'Longitude']
-        
+        # Column Mapping: DISPATCH_HEADER
         new_row = [
             date_str,                           # Date
             "",                                 # SL. No (Auto/Empty)
-            "",                                 # EID. No
+            "",                                 # EID. No (dispatch reference, set when saved)
             time_str,                           # Event Received time
             "Anonymous Caller (Digital)",       # Complaint Name...
             data.get('type', 'Others'),         # Event type 
@@ -459,77 +701,185 @@ def submit_dispatch():
             lon                                 # Longitude
         ]
 
-        # 3. Append to Google Sheet
-        gc_client = get_gspread_client()
-        if gc_client:
-            sh = gc_client.open(WORKBOOK_100_CALLS)
-            ws = sh.worksheet(TAB_100_CALLS)
-            ws.append_row(new_row)
-            logging.info("Successfully appended row to 100_calls.")
-            return jsonify({
-                "status": "success", 
-                "message": "Incident dispatched and saved.",
-                "latitude": lat,
-                "longitude": lon
-            })
-        else:
-            return jsonify({"error": "Database Connection Failed"}), 500
+        # 3. Journal locally; the write-behind queue mirrors it to Google Sheet
+        dispatch_id = incident_store.add_dispatch(new_row, data, ref_column=DISPATCH_REF_COLUMN)
+        logging.info(f"Dispatch {dispatch_id} saved to local store.")
+        dispatch_queue.notify()
+        # 4. Push to open dashboards off the request thread (add_live waits out any sync in progress)
+        socketio.start_background_task(publish_dispatch, dispatch_id, new_row)
+        return jsonify({
+            "status": "success", 
+            "message": "Incident dispatched and saved.",
+            "dispatch_id": dispatch_id,
+            "latitude": lat,
+            "longitude": lon,
+            "subdivision": data['subdivision']
+        })
 
     except Exception as e:
         logging.error(f"Dispatch Error: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/dispatch_queue')
+@login_required
+def dispatch_queue_status():
+    """Depth and flush latency of the Sheets write-behind queue."""
+    return jsonify(dispatch_queue.status())
+
+@app.route('/api/cleaning_stats')
+@login_required
+def cleaning_stats():
+    """Hit rates of the memoized date and police-station normalisers."""
+    return jsonify({"dates": date_normalizer.stats(), "stations": station_resolver.stats()})
+
+@app.route('/api/station_aliases', methods=['GET', 'POST'])
+@login_required
+def station_aliases():
+    """GET: resolver cache stats and learned aliases. POST {alias, station}: teach a new spelling."""
+    if request.method == 'POST':
+        data = request.json or {}
+        try:
+            key = station_resolver.learn(data.get('alias') or '', data.get('station') or '')
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        incident_store.save_station_alias(key, data['station'])
+        return jsonify({"status": "success", "alias": key, "station": data['station']})
+    return jsonify({"stats": station_resolver.stats(), "aliases": station_resolver.learned()})
+
 # --- SocketIO Events for RAPID-100 ---
 @socketio.on('connect')
 def handle_connect():
     logging.info(f"Client connected: {request.sid}")
 
-@socketio.on('audio_stream')
-def handle_audio_stream(data):
-    """
-    Receives audio chunks (blob) from client, sends to AI, returns analysis.
-    """
+@socketio.on('join_dashboard')
+def handle_join_dashboard():
+    """Dashboards join a room to receive `new_incident` pushes."""
+    if not (current_user.is_authenticated or app.config.get('LOGIN_DISABLED')):
+        return
+    join_room(DASHBOARD_ROOM)
+    logging.info(f"Client {request.sid} joined {DASHBOARD_ROOM} updates.")
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    audio_pipeline.drop(request.sid)
+    session_contexts.drop(request.sid)
+    logging.info(f"Client disconnected: {request.sid}")
+
+def process_audio_chunk(sid, audio_blob):
+    """Pipeline worker: AI analysis, then TTS, for one chunk of one caller. Results are emitted to that caller only."""
     try:
-        # data is expected to be a dict: {'audio': base64_string}
-        audio_blob = data.get('audio')
-        if not audio_blob: return
-
-        # Call AI Service
-        analysis = ai_service.process_audio(audio_blob)
+        # Call AI Service with this caller's own language/incident memory
+        analysis = ai_service.process_audio(audio_blob, session_contexts.get(sid))
         
         # Check for skip
         if analysis.get("skip"):
             return
 
-        # Emit initial results (Text/Analysis) IMMEDIATELY
-        emit('analysis_result', analysis)
-
-        # --- Generate TTS Audio (Async-like) ---
-        # If we have a native response text, generate audio
-        if analysis.get("suggested_response_native") or analysis.get("suggested_response"):
+        # --- Start TTS before emitting, so synthesis overlaps the analysis emit ---
+        # use native response if available, otherwise standard English response
+        text_to_speak = analysis.get("suggested_response_native") or analysis.get("suggested_response")
+        tts_segments = []
+        if text_to_speak:
             try:
                 from tts_service import tts_service
-                # use native response if available, otherwise standard English response
-                text_to_speak = analysis.get("suggested_response_native") or analysis.get("suggested_response")
-                lang = analysis.get("detected_language", "English")
-                
                 logging.info(f"Generating TTS for: {text_to_speak[:30]}...")
-                audio_content = tts_service.generate_speech(text_to_speak, lang)
-                
-                if audio_content:
-                    # Emit Update with Audio
-                    logging.info(f"TTS Generated ({len(audio_content)} bytes). Sending audio update.")
-                    emit('analysis_result', {
-                        "audio_response": audio_content,
-                        "suggested_response": analysis.get("suggested_response"), # Required for context match in JS
-                        "suggested_response_native": analysis.get("suggested_response_native")
-                    })
+                tts_segments = tts_service.synthesize_async(text_to_speak, analysis.get("detected_language", "English"))
             except Exception as e:
                 logging.error(f"Error generating TTS: {e}")
+
+        # Emit initial results (Text/Analysis) IMMEDIATELY
+        socketio.emit('analysis_result', analysis, to=sid)
+
+        if tts_segments:
+            stream_tts(sid, tts_segments)
         
     except Exception as e:
         logging.error(f"SocketIO Error: {e}")
-        emit('error', {'message': str(e)})
+        socketio.emit('error', {'message': str(e)}, to=sid)
+
+TTS_CHUNK_BYTES = int(os.environ.get('TTS_CHUNK_BYTES', 16384))
+
+def stream_tts(sid, segments):
+    """
+    Streams synthesized speech to one client as binary Socket.IO frames:
+    'tts_start' {id, mime}, then 'tts_chunk' {id, seq, data: bytes} per chunk, then 'tts_end' {id, chunks}.
+    Sentences are sent in order as soon as each one is ready.
+    """
+    stream_id, seq = uuid.uuid4().hex[:12], 0
+    for segment in segments:
+        try:
+            audio = segment.result()
+        except Exception as e:
+            logging.error(f"Error generating TTS: {e}")
+            audio = None
+        if not audio:
+            continue
+        if seq == 0:
+            socketio.emit('tts_start', {"id": stream_id, "mime": "audio/mpeg"}, to=sid)
+        for offset in range(0, len(audio), TTS_CHUNK_BYTES):
+            socketio.emit('tts_chunk', {"id": stream_id, "seq": seq, "data": audio[offset:offset + TTS_CHUNK_BYTES]}, to=sid)
+            seq += 1
+    if seq:
+        socketio.emit('tts_end', {"id": stream_id, "chunks": seq}, to=sid)
+        logging.info(f"TTS streamed to {sid} in {seq} chunks.")
+
+# AI + TTS calls block for seconds, so they run on a bounded pool instead of in the Socket.IO handler
+audio_pipeline = AudioPipeline(process_audio_chunk)
+
+@socketio.on('audio_stream')
+def handle_audio_stream(data):
+    """
+    Receives audio chunks (blob) from client and queues them for analysis; results arrive as 'analysis_result'.
+    """
+    # data is expected to be a dict: {'audio': <binary attachment>}; older clients send a base64 string
+    audio_blob = (data or {}).get('audio')
+    if not audio_blob: return
+    if isinstance(audio_blob, str):
+        try:
+            audio_blob = base64.b64decode(audio_blob)
+        except ValueError:
+            emit('error', {'message': "Invalid audio payload."})
+            return
+    if not audio_pipeline.submit(request.sid, audio_blob):
+        emit('error', {'message': "Server busy, audio chunk dropped. Please repeat."})
+
+def prewarm_tts():
+    """Synthesizes the common dispatcher phrases (TTS_PREWARM_FILE) into the TTS cache in the background."""
+    try:
+        from tts_service import tts_service
+        tts_service.prewarm()
+    except Exception as e:
+        logging.error(f"TTS prewarm failed: {e}")
+
+threading.Thread(target=prewarm_tts, name="tts-prewarm", daemon=True).start()
+
+@app.route('/api/tts_cache')
+@login_required
+def tts_cache_status():
+    """Hit/miss metrics of the synthesized-speech cache."""
+    try:
+        from tts_service import tts_service
+    except ImportError as e:
+        return jsonify({"error": f"TTS unavailable: {e}"}), 503
+    return jsonify(tts_service.cache.stats())
+
+@app.route('/api/audio_pipeline')
+@login_required
+def audio_pipeline_status():
+    """Queue depth, drops and latency of the audio analysis pipeline."""
+    return jsonify({**audio_pipeline.status(), "sessions": session_contexts.stats(), "vad": voice_activity.stats()})
+
+@app.route('/api/geocoder')
+@login_required
+def geocoder_status():
+    """How dispatch locations were resolved (gazetteer, cache, API) and cache sizes."""
+    return jsonify(geocoder.stats())
+
+@app.route('/api/transcript_filter')
+@login_required
+def transcript_filter_status():
+    """Loaded hallucination filter rules and how often each one fired."""
+    return jsonify(transcript_filter.stats())
 
 # --- Main Execution ---
 if __name__ == '__main__':
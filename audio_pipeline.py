@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class AudioPipeline:
+    """
+    Bounded worker pool for audio chunks received over Socket.IO.
+    - submit() only enqueues, so the event handler returns immediately.
+    - Chunks of one session are processed one at a time, in arrival order; different sessions run in parallel.
+    - Backpressure: a session keeps at most `max_pending_per_session` waiting chunks (the oldest are dropped as stale),
+      and new chunks are rejected while `max_pending_total` chunks are already waiting.
+    """
+
+    def __init__(self, process_fn, workers=None, max_pending_per_session=None, max_pending_total=None):
+        """
+        Args:
+            process_fn (callable): process_fn(sid, chunk) does the blocking work and emits results itself.
+        """
+        self.process_fn = process_fn
+        self.workers = workers or int(os.environ.get('AUDIO_PIPELINE_WORKERS', 4))
+        self.max_pending_per_session = max_pending_per_session or int(os.environ.get('AUDIO_PIPELINE_MAX_PENDING_PER_SESSION', 2))
+        self.max_pending_total = max_pending_total or int(os.environ.get('AUDIO_PIPELINE_MAX_PENDING', 64))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="audio")
+        self._queues = {}      # sid -> deque of (enqueued_at, chunk)
+        self._active = set()   # sids with a worker currently assigned
+        self._lock = threading.Lock()
+        self.processed = self.dropped_stale = self.rejected = self.failed = 0
+        self.last_wait_seconds = self.last_process_seconds = None
+
+    def submit(self, sid, chunk):
+        """Queues a chunk for `sid`. Returns False if it was rejected because the pipeline is saturated."""
+        with self._lock:
+            if self._pending_count() >= self.max_pending_total:
+                self.rejected += 1
+                logger.warning(f"Audio pipeline saturated; rejected chunk from {sid}.")
+                return False
+            queue = self._queues.setdefault(sid, deque())
+            queue.append((time.monotonic(), chunk))
+            while len(queue) > self.max_pending_per_session:
+                queue.popleft()
+                self.dropped_stale += 1
+                logger.info(f"Dropped stale audio chunk for {sid} (backlog > {self.max_pending_per_session}).")
+            if sid not in self._active:
+                self._active.add(sid)
+                self._executor.submit(self._run_next, sid)
+        return True
+
+    def drop(self, sid):
+        """Discards chunks still waiting for `sid` (e.g. on disconnect). A chunk already running finishes."""
+        with self._lock:
+            queue = self._queues.pop(sid, None)
+            return len(queue) if queue else 0
+
+    def _pending_count(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def _run_next(self, sid):
+        with self._lock:
+            queue = self._queues.get(sid)
+            if not queue:
+                self._active.discard(sid)
+                self._queues.pop(sid, None)
+                return
+            enqueued_at, chunk = queue.popleft()
+        started, ok = time.monotonic(), False
+        try:
+            self.process_fn(sid, chunk)
+            ok = True
+        except Exception as e:
+            logger.error(f"Audio pipeline error for {sid}: {e}", exc_info=True)
+        finally:
+            # Re-queue behind other sessions instead of looping, so one busy caller cannot starve the rest
+            with self._lock:
+                if ok: self.processed += 1
+                else: self.failed += 1
+                self.last_wait_seconds = round(started - enqueued_at, 3)
+                self.last_process_seconds = round(time.monotonic() - started, 3)
+                if self._queues.get(sid):
+                    self._executor.submit(self._run_next, sid)
+                else:
+                    self._active.discard(sid)
+                    self._queues.pop(sid, None)
+
+    def status(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending_count(),
+                "active_sessions": len(self._active),
+                "processed": self.processed,
+                "failed": self.failed,
+                "dropped_stale": self.dropped_stale,
+                "rejected": self.rejected,
+                "last_wait_seconds": self.last_wait_seconds,
+                "last_process_seconds": self.last_process_seconds,
+            }
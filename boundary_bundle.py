@@ -0,0 +1,116 @@
+import os
+import json
+import logging
+from subdivision_locator import SUBDIVISION_FILES
+from http_cache import EncodedPayload, brotli
+
+logger = logging.getLogger(__name__)
+
+# (highest map zoom, Douglas-Peucker tolerance in degrees): about one screen pixel at that zoom; the last level keeps every vertex
+BOUNDARY_LEVELS = ((10, 0.0014), (12, 0.0004), (22, 0.0))
+# Coordinates are snapped to a QUANTIZATION x QUANTIZATION grid over the bundle's bbox (about 1.3 m here)
+QUANTIZATION = 100000
+
+
+def simplify(points, tolerance):
+    """Douglas-Peucker on a list of (x, y); endpoints are kept."""
+    if tolerance <= 0 or len(points) < 3: return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    tolerance_sq = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        (x0, y0), (x1, y1) = points[first], points[last]
+        dx, dy = x1 - x0, y1 - y0
+        length_sq = dx * dx + dy * dy
+        farthest, farthest_sq = None, tolerance_sq
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length_sq:
+                t = max(0.0, min(1.0, ((px - x0) * dx + (py - y0) * dy) / length_sq))
+                ex, ey = x0 + t * dx - px, y0 + t * dy - py
+            else:
+                ex, ey = px - x0, py - y0
+            distance_sq = ex * ex + ey * ey
+            if distance_sq > farthest_sq: farthest, farthest_sq = i, distance_sq
+        if farthest is not None:
+            keep[farthest] = True
+            stack.extend(((first, farthest), (farthest, last)))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def simplify_ring(ring, tolerance):
+    """Simplifies a closed ring in two halves (split at the vertex farthest from the start) so it never collapses."""
+    if tolerance <= 0 or len(ring) <= 4: return ring
+    x0, y0 = ring[0]
+    split = max(range(len(ring)), key=lambda i: (ring[i][0] - x0) ** 2 + (ring[i][1] - y0) ** 2)
+    simplified = simplify(ring[:split + 1], tolerance)[:-1] + simplify(ring[split:], tolerance)
+    return simplified if len(simplified) >= 4 else ring
+
+
+class BoundaryBundle:
+    """
+    All subdivision boundaries in one compact JSON document, built once at boot:
+    - one copy of each ring per zoom level, simplified to about a pixel at that zoom;
+    - coordinates quantised to integers over a shared transform and delta-encoded (TopoJSON-style);
+    - compressed bodies and content-hash ETag computed up front, so requests only copy bytes.
+    The source files share no vertices between neighbouring subdivisions, so there are no common arcs to merge.
+    """
+
+    def __init__(self, directory=None, files=None, levels=BOUNDARY_LEVELS):
+        self.directory = directory or os.environ.get('SUBDIVISION_GEOJSON_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'geojson'))
+        subdivisions = self._load(files or SUBDIVISION_FILES)
+        bundle = self._encode(subdivisions, levels)
+        self.encoded = EncodedPayload(json.dumps(bundle, separators=(",", ":")).encode("utf-8"))
+        self.version = self.encoded.etag
+        gzipped = len(self.encoded.variant('gzip'))
+        if brotli is not None: self.encoded.variant('br')
+        logger.info(f"Boundary bundle {self.version}: {len(subdivisions)} subdivisions, {len(self.encoded.body)} bytes, {gzipped} gzipped.")
+
+    def _load(self, files):
+        subdivisions = []
+        for filename, name in files.items():
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    features = json.load(f)["features"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Could not load subdivision boundary {filename}: {e}")
+                continue
+            polygons = []
+            for feature in features:
+                geometry = feature["geometry"]
+                coordinates = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+                polygons.extend([[tuple(p[:2]) for p in ring] for ring in polygon] for polygon in coordinates)
+            subdivisions.append((name, polygons))
+        return subdivisions
+
+    @staticmethod
+    def _encode(subdivisions, levels):
+        points = [p for _, polygons in subdivisions for polygon in polygons for ring in polygon for p in ring]
+        if not points:
+            return {"transform": {"scale": [1, 1], "translate": [0, 0]}, "levels": []}
+        min_x, min_y = min(p[0] for p in points), min(p[1] for p in points)
+        scale_x = (max(p[0] for p in points) - min_x) / (QUANTIZATION - 1) or 1
+        scale_y = (max(p[1] for p in points) - min_y) / (QUANTIZATION - 1) or 1
+
+        def encode_ring(ring):
+            # Delta-encoded integer pairs, consecutive duplicates (after snapping) dropped
+            flat, last = [], (0, 0)
+            for x, y in ring:
+                q = (round((x - min_x) / scale_x), round((y - min_y) / scale_y))
+                if q == last and flat: continue
+                flat.extend((q[0] - last[0], q[1] - last[1]))
+                last = q
+            return flat
+
+        encoded_levels = []
+        for max_zoom, tolerance in levels:
+            features = [{"name": name, "polygons": [[encode_ring(simplify_ring(ring, tolerance)) for ring in polygon] for polygon in polygons]}
+                        for name, polygons in subdivisions]
+            encoded_levels.append({"max_zoom": max_zoom, "features": features})
+        return {"transform": {"scale": [scale_x, scale_y], "translate": [min_x, min_y]}, "levels": encoded_levels}
+
+
+# Singleton instance
+boundary_bundle = BoundaryBundle()
@@ -0,0 +1,136 @@
+import bisect
+import logging
+import operator
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Query-string parameters understood by /api/data/<sheet_name>
+QUERY_PARAMS = ('from', 'to', 'subdivisions', 'types', 'sub_categories', 'bbox', 'limit', 'cursor', 'fields')
+
+
+def record_type_value(item):
+    """Event type for 100_calls rows, crime type for Robbrey-theft rows."""
+    return item.get('EventType', item.get('CrimeType'))
+
+
+def is_prefix(rows, data):
+    """
+    True if `data` starts with the very record objects in `rows`, i.e. a later version only appended to them.
+    Checks every row (identity, so cheap): a reload may rebuild earlier rows and still end on a reused one.
+    """
+    return 0 < len(rows) <= len(data) and all(map(operator.is_, rows, data))
+
+
+class DatasetIndex:
+    """
+    Secondary indexes over one version of a processed dataset.
+    Row positions (the original order) are used as ids and as pagination cursors.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        dated = sorted((item['Date'], pos) for pos, item in enumerate(data) if item.get('Date'))
+        self.dates = [d for d, _ in dated]
+        self.date_positions = [pos for _, pos in dated]
+        self.by_subdivision = self._group(lambda item: item.get('Subdivision'))
+        self.by_type = self._group(record_type_value)
+        self.by_sub_category = self._group(lambda item: item.get('SubCategory'))
+
+    def _group(self, key_fn):
+        groups = {}
+        for pos, item in enumerate(self.data):
+            groups.setdefault(key_fn(item), set()).add(pos)
+        return groups
+
+    def match(self, date_from=None, date_to=None, subdivisions=None, types=None, sub_categories=None, bbox=None):
+        """Returns the sorted row positions matching every given filter."""
+        candidate_sets = []
+        if date_from or date_to:
+            lo = bisect.bisect_left(self.dates, date_from) if date_from else 0
+            hi = bisect.bisect_right(self.dates, date_to) if date_to else len(self.dates)
+            candidate_sets.append(set(self.date_positions[lo:hi]))
+        for values, groups in ((subdivisions, self.by_subdivision), (types, self.by_type), (sub_categories, self.by_sub_category)):
+            if values is not None:
+                candidate_sets.append(set().union(*(groups.get(v, ()) for v in values)))
+
+        if candidate_sets:
+            candidate_sets.sort(key=len)
+            positions = candidate_sets[0].intersection(*candidate_sets[1:])
+        else:
+            positions = range(len(self.data))
+
+        if bbox:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            positions = [p for p in positions if min_lat <= self.data[p]['Latitude'] <= max_lat and min_lon <= self.data[p]['Longitude'] <= max_lon]
+        return sorted(positions)
+
+
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def index_for(sheet_name, version, data):
+    """Returns the DatasetIndex for this dataset version, building it once."""
+    with _index_lock:
+        cached = _index_cache.get(sheet_name)
+        if cached and cached[0] == version:
+            return cached[1]
+    index = DatasetIndex(data)
+    with _index_lock:
+        _index_cache[sheet_name] = (version, index)
+    return index
+
+
+def parse_list(args, name):
+    """
+    List parameter given as repeated keys (?types=A&types=B), so values may contain commas.
+    Present-but-empty means 'match nothing'.
+    """
+    if name not in args:
+        return None
+    return [v.strip() for v in args.getlist(name) if v.strip()]
+
+
+def parse_query(args):
+    """Parses request.args into keyword arguments for run_query. Raises ValueError on bad input."""
+    bbox = None
+    if args.get('bbox'):
+        bbox = [float(v) for v in args['bbox'].split(',')]
+        if len(bbox) != 4:
+            raise ValueError("bbox must be 'minLon,minLat,maxLon,maxLat'")
+    limit = int(args['limit']) if args.get('limit') else None
+    if limit is not None and limit < 0:
+        raise ValueError("limit must be >= 0")
+    return {
+        "date_from": args.get('from') or None,
+        "date_to": args.get('to') or None,
+        "subdivisions": parse_list(args, 'subdivisions'),
+        "types": parse_list(args, 'types'),
+        "sub_categories": parse_list(args, 'sub_categories'),
+        "bbox": bbox,
+        "limit": limit,
+        "cursor": int(args['cursor']) if args.get('cursor') else None,
+        "fields": parse_list(args, 'fields'),
+    }
+
+
+def run_query(index, filters, limit=None, cursor=None, fields=None, **match_kwargs):
+    """
+    Filters, paginates and projects a dataset.
+    Returns {data, filters, total, next_cursor}; `next_cursor` is None on the last page.
+    """
+    positions = index.match(**match_kwargs)
+    total = len(positions)
+    if cursor is not None:
+        positions = positions[bisect.bisect_right(positions, cursor):]
+    next_cursor = None
+    if limit is not None and len(positions) > limit:
+        positions = positions[:limit]
+        next_cursor = positions[-1] if positions else cursor
+    rows = (index.data[p] for p in positions)
+    if fields:
+        data = [{f: item.get(f) for f in fields} for item in rows]
+    else:
+        data = list(rows)
+    return {"data": data, "filters": filters, "total": total, "next_cursor": next_cursor}
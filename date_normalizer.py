@@ -0,0 +1,103 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict, Counter
+from datetime import date, timedelta
+from dateutil.parser import parse as parse_date, ParserError
+
+logger = logging.getLogger(__name__)
+
+# Same pattern the original standardize_date searched for; the fast path parses its groups directly
+DMY_PATTERN = re.compile(r'(\d{1,2})([\.\/-])(\d{1,2})([\.\/-])(\d{2,4})')
+SERIAL_PATTERN = re.compile(r'\d{5}(?:\.0+)?')
+RANGE_WORDS = ('between', 'after', 'before')
+# Spreadsheet serial dates count days from 1899-12-30; only 2000-01-01 .. 2099-12-31 is accepted
+SERIAL_EPOCH = date(1899, 12, 30)
+SERIAL_MIN, SERIAL_MAX = 36526, 73050
+
+
+def two_digit_year(year):
+    """dateutil's rule: the century that puts the year within 50 years of today."""
+    this_year = date.today().year
+    year += this_year - this_year % 100
+    if year >= this_year + 50: year -= 100
+    elif year < this_year - 50: year += 100
+    return year
+
+
+class DateNormalizer:
+    """
+    Converts messy sheet dates to 'YYYY-MM-DD' (or None).
+    Paths, cheapest first: memo -> precompiled dd-mm-yy(yy) -> spreadsheet serial -> dateutil -> fuzzy dateutil.
+    Results match the original regex + dateutil(dayfirst=True) behaviour; serial numbers are the only addition.
+    """
+
+    def __init__(self, cache_size=None):
+        self.cache_size = cache_size or int(os.environ.get('DATE_NORMALIZER_CACHE_SIZE', 8192))
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.paths = Counter()
+
+    def normalize(self, date_string):
+        if not date_string: return None
+        raw = str(date_string)
+        with self._lock:
+            if raw in self._cache:
+                self._cache.move_to_end(raw)
+                self.paths['memo'] += 1
+                return self._cache[raw]
+        path, result = self._parse(raw)
+        with self._lock:
+            self.paths[path] += 1
+            self._cache[raw] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _parse(self, raw):
+        """Returns (path name, result)."""
+        cleaned = raw.strip().lower()
+        if cleaned in RANGE_WORDS: return 'rejected', None
+        match = DMY_PATTERN.search(cleaned)
+        if match:
+            day, sep1, month, sep2, year = match.groups()
+            fast = self._parse_dmy(day, month, year) if sep1 == sep2 else None
+            if fast: return 'fast_dmy', fast
+            date_to_parse = match.group(0)
+        else:
+            if SERIAL_PATTERN.fullmatch(cleaned):
+                serial = int(float(cleaned))
+                if SERIAL_MIN <= serial <= SERIAL_MAX:
+                    return 'serial', (SERIAL_EPOCH + timedelta(days=serial)).strftime('%Y-%m-%d')
+            date_to_parse = cleaned
+        try: return 'dateutil', parse_date(date_to_parse, dayfirst=True, fuzzy=False).strftime('%Y-%m-%d')
+        except (ValueError, TypeError, ParserError, OverflowError):
+            try: return 'dateutil_fuzzy', parse_date(date_to_parse, dayfirst=True, fuzzy=True).strftime('%Y-%m-%d')
+            except (ValueError, TypeError, ParserError, OverflowError): return 'rejected', None
+
+    @staticmethod
+    def _parse_dmy(day, month, year):
+        """Day-first parse of regex groups; None hands the value to dateutil (odd years, impossible dates)."""
+        day, month = int(day), int(month)
+        if len(year) == 4 and year[0] != '0': year = int(year)
+        elif len(year) == 2: year = two_digit_year(int(year))
+        else: return None
+        if month > 12 and day <= 12: day, month = month, day  # dateutil swaps when only day/month order fits
+        try: parsed = date(year, month, day)
+        except ValueError: return None
+        return parsed.strftime('%Y-%m-%d')
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self.paths.values())
+            return {
+                "cached": len(self._cache),
+                "cache_size": self.cache_size,
+                "lookups": lookups,
+                "paths": {path: {"count": count, "rate": round(count / lookups, 4)} for path, count in self.paths.items()},
+            }
+
+
+# Singleton instance
+date_normalizer = DateNormalizer()
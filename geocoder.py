@@ -0,0 +1,197 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+TOKEN_RE = re.compile(r"(?:\w|[\u0900-\u0DFF])+")  # Words, keeping Indic vowel signs
+# Tanglish case endings glued to place names ("kovilpattila", "tiruchendurukku")
+SUFFIXES = ("ukku", "kku", "kitta", "ile", "ula", "la", "le", "il", "ku")
+# More specific places win when several match the same text
+KIND_RANK = {"landmark": 0, "station": 1, "village": 2, "town": 3, "city": 4}
+COARSE_KINDS = ("city",)
+
+
+def normalize_query(text):
+    return " ".join(TOKEN_RE.findall(str(text).lower()))
+
+
+class Gazetteer:
+    """
+    Offline place names (gazetteer.json) indexed by normalised name, so a text is matched by looking up
+    its word n-grams instead of scanning every place.
+    Entry: {name, aliases, lat, lon, kind}.
+    """
+
+    def __init__(self, entries=()):
+        self._index = {}  # normalised name/alias -> entry
+        self.longest = 0
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)["places"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load gazetteer {path}: {e}")
+            entries = []
+        gazetteer = cls(entries)
+        logger.info(f"Gazetteer loaded: {len(entries)} places, {len(gazetteer)} names.")
+        return gazetteer
+
+    def add(self, entry):
+        place = {"name": entry["name"], "lat": str(entry["lat"]), "lon": str(entry["lon"]), "kind": entry.get("kind", "village")}
+        for name in [entry["name"]] + list(entry.get("aliases", [])):
+            key = normalize_query(name)
+            if key:
+                self._index.setdefault(key, place)
+                self.longest = max(self.longest, len(key.split()))
+
+    def __len__(self):
+        return len(self._index)
+
+    def match(self, text):
+        """Most specific place named in `text`, or None."""
+        tokens = TOKEN_RE.findall(str(text).lower())
+        best = None
+        for start in range(len(tokens)):
+            for size in range(min(self.longest, len(tokens) - start), 0, -1):
+                place = self._lookup(tokens[start:start + size])
+                if place:
+                    rank = (KIND_RANK.get(place["kind"], len(KIND_RANK)), -size, start)
+                    if best is None or rank < best[0]: best = (rank, place)
+                    break
+        return best[1] if best else None
+
+    def _lookup(self, tokens):
+        key = " ".join(tokens)
+        place = self._index.get(key)
+        if place is None:
+            last = tokens[-1]
+            for suffix in SUFFIXES:
+                if last.endswith(suffix) and len(last) - len(suffix) >= 4:
+                    place = self._index.get(" ".join(tokens[:-1] + [last[:-len(suffix)]]))
+                    if place: break
+        return place
+
+
+class Geocoder:
+    """
+    Text -> (lat, lon) for dispatches.
+    Order: offline gazetteer -> cached answers (persisted in IncidentStore, including "no result") -> Google Geocoding API.
+    Remote calls share one pooled session with a timeout; misses are cached for `negative_ttl` seconds.
+    """
+
+    def __init__(self, api_key, store, gazetteer=None, timeout=None, negative_ttl=None, pool_size=None):
+        self.api_key = api_key if api_key and "YOUR_GOOGLE_MAPS_API_KEY" not in api_key else None
+        self.store = store
+        self.gazetteer = gazetteer if gazetteer is not None else Gazetteer.from_file(os.environ.get('GAZETTEER_FILE', 'gazetteer.json'))
+        self.timeout = timeout or float(os.environ.get('GEOCODE_TIMEOUT_SECONDS', 5))
+        self.negative_ttl = negative_ttl or float(os.environ.get('GEOCODE_NEGATIVE_TTL_SECONDS', 86400))
+        pool_size = pool_size or int(os.environ.get('GEOCODE_HTTP_POOL_SIZE', 4))
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self._cache = store.load_geocodes()  # query -> (lat, lon, created_at); lat None = no result
+        self._lock = threading.Lock()
+        self.counts = {"gazetteer": 0, "cache": 0, "negative_cache": 0, "remote": 0, "remote_miss": 0, "remote_error": 0, "unresolved": 0}
+        logger.info(f"Geocoder ready: {len(self.gazetteer)} gazetteer names, {len(self._cache)} cached queries.")
+
+    def locate(self, texts, remote_query=None):
+        """
+        Args:
+            texts (list): Free-text fields in priority order, matched against the gazetteer.
+            remote_query (str): What to send to the Geocoding API when no text names a known place.
+        Returns:
+            (lat, lon, source) with lat/lon as strings, or None.
+        """
+        coarse = None
+        for text in texts:
+            if not text: continue
+            place = self.gazetteer.match(text)
+            if place and place["kind"] not in COARSE_KINDS:
+                return self._local(place, text)
+            if place and coarse is None: coarse = (place, text)
+        # A city name alone is less precise than what the API can find for the full address
+        if remote_query:
+            result = self.geocode(remote_query)
+            if result: return result
+        if coarse: return self._local(*coarse)
+        self._count("unresolved")
+        return None
+
+    def _local(self, place, text):
+        self._count("gazetteer")
+        logger.info(f"Geocoding (Local): '{place['name']}' in text '{text}' -> {place['lat']}, {place['lon']}")
+        return place["lat"], place["lon"], "gazetteer"
+
+    def geocode(self, query):
+        key = normalize_query(query)
+        if not key: return None
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached:
+            lat, lon, created_at = cached
+            if lat is not None:
+                self._count("cache")
+                return lat, lon, "cache"
+            if time.time() - created_at < self.negative_ttl:
+                self._count("negative_cache")
+                return None
+        if not self.api_key: return None
+        return self._remote(key, query)
+
+    def _remote(self, key, query):
+        params = {"address": f"{query}, Tamil Nadu, India", "key": self.api_key}  # 'Tamil Nadu' for context, other districts still resolve
+        try:
+            response = self.session.get(GEOCODE_URL, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            geo_data = response.json()
+            status = geo_data.get("status")
+            if status not in ("OK", "ZERO_RESULTS"):
+                raise ValueError(f"status {status}: {geo_data.get('error_message', '')}")
+        except (requests.RequestException, ValueError) as e:
+            self._count("remote_error")
+            logger.error(f"Geocoding (API) Error: {e}")
+            return None  # Quota/auth/network problems are not cached
+        results = geo_data.get("results")
+        if not results:
+            self._count("remote_miss")
+            logger.warning(f"Geocoding (API): No results for {query}")
+            self._remember(key, None, None)
+            return None
+        loc = results[0]["geometry"]["location"]
+        lat, lon = str(loc["lat"]), str(loc["lng"])
+        self._count("remote")
+        logger.info(f"Geocoding (API): '{query}' to {lat}, {lon}")
+        self._remember(key, lat, lon)
+        return lat, lon, "api"
+
+    def _remember(self, key, lat, lon):
+        with self._lock:
+            self._cache[key] = (lat, lon, time.time())
+        try:
+            self.store.save_geocode(key, lat, lon)
+        except Exception as e:
+            logger.warning(f"Could not persist geocode for '{key}': {e}")
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "gazetteer_names": len(self.gazetteer),
+                "cached_queries": sum(1 for lat, _, _ in self._cache.values() if lat is not None),
+                "negative_queries": sum(1 for lat, _, _ in self._cache.values() if lat is None),
+                "remote_enabled": self.api_key is not None,
+                "resolved_by": dict(self.counts),
+            }
@@ -0,0 +1,131 @@
+import os
+import gzip
+import uuid
+import hashlib
+import logging
+import threading
+from flask import current_app, request, make_response
+
+logger = logging.getLogger(__name__)
+
+# Optional: brotli is preferred when installed and accepted; gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+# Cache versions restart at 1 in every process, so query ETags also carry this process's identity
+INSTANCE_ID = uuid.uuid4().hex
+
+
+def compress(body, encoding, cached=True):
+    """Cached payloads are compressed once, so they get the highest level; per-request bodies a fast one."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if cached else 5)
+    return gzip.compress(body, compresslevel=9 if cached else 6, mtime=0)
+
+
+def json_bytes(payload):
+    """Exactly the body jsonify() would send."""
+    return current_app.json.response(payload).get_data()
+
+
+def negotiate(size):
+    """Best encoding the client accepts for a body of `size` bytes, or None for identity."""
+    if size < COMPRESS_MIN_BYTES: return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']: return 'br'
+    if accepted['gzip']: return 'gzip'
+    return None
+
+
+class EncodedPayload:
+    """
+    A JSON response serialised once: body bytes, a content-hash ETag and compressed variants made on first use.
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, payload):
+        return cls(json_bytes(payload))
+
+    def variant(self, encoding):
+        if encoding is None: return self.body
+        with self._lock:
+            data = self._variants.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding)
+            with self._lock:
+                self._variants.setdefault(encoding, data)
+        return data
+
+
+_encoded = {}  # sheet name -> (version, EncodedPayload)
+_encoded_lock = threading.Lock()
+
+
+def encoded_for(sheet_name, version, payload):
+    """Returns the EncodedPayload for this dataset version, serialising it once."""
+    with _encoded_lock:
+        cached = _encoded.get(sheet_name)
+        if cached and cached[0] == version:
+            return cached[1]
+    encoded = EncodedPayload.from_json(payload)
+    with _encoded_lock:
+        _encoded[sheet_name] = (version, encoded)
+    logger.info(f"Encoded {sheet_name} v{version}: {len(encoded.body)} bytes, etag {encoded.etag}.")
+    return encoded
+
+
+def derived_etag(sheet_name, version):
+    """
+    ETag for a response computed from a dataset version: (process, sheet, version) plus this route and its query arguments.
+    Costs nothing per version, unlike hashing the serialised dataset.
+    """
+    args = sorted((k, v) for k, values in request.args.lists() if k != 'refresh' for v in values)
+    return hashlib.sha256(repr((INSTANCE_ID, sheet_name, version, request.path, args)).encode("utf-8")).hexdigest()[:20]
+
+
+def _headers(response, tag, cache_control):
+    response.vary.add('Accept-Encoding')
+    response.set_etag(tag)
+    if cache_control:
+        for key, value in cache_control.items(): setattr(response.cache_control, key, value)
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True  # Always revalidate; unchanged data costs a 304
+    return response
+
+
+def _finish(response, etag, encoding, cache_control):
+    response.mimetype = 'application/json'
+    if encoding: response.content_encoding = encoding
+    # Strong validators are per representation, so each encoding gets its own tag
+    return _headers(response, f"{etag}-{encoding}" if encoding else etag, cache_control).make_conditional(request)
+
+
+def not_modified(etag, cache_control=None):
+    """A 304 response if the client already holds `etag` in any encoding, else None (so the caller can skip the work)."""
+    for tag in (etag, f"{etag}-gzip", f"{etag}-br"):
+        if request.if_none_match.contains(tag):
+            return _headers(make_response(b"", 304), tag, cache_control)
+    return None
+
+
+def send_payload(encoded, cache_control=None):
+    """Response for a pre-serialised payload, compressed per Accept-Encoding and answering If-None-Match."""
+    encoding = negotiate(len(encoded.body))
+    return _finish(make_response(encoded.variant(encoding)), encoded.etag, encoding, cache_control)
+
+
+def send_json(payload, etag):
+    """Response for a per-request JSON result, with a caller-supplied ETag."""
+    body = json_bytes(payload)
+    encoding = negotiate(len(body))
+    return _finish(make_response(compress(body, encoding, cached=False) if encoding else body), etag, encoding, None)
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    sheet TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (sheet, seq)
+);
+-- Filtering is served from memory (data_query); these only slowed inserts
+DROP INDEX IF EXISTS idx_records_date;
+DROP INDEX IF EXISTS idx_records_subdivision;
+DROP INDEX IF EXISTS idx_records_event_type;
+
+CREATE TABLE IF NOT EXISTS sheet_meta (
+    sheet TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    prefix_hash TEXT,
+    filters TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dispatches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    sheet_row TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    mirrored_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    rejections INTEGER NOT NULL DEFAULT 0,
+    dead_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_dispatches_pending ON dispatches (mirrored_at, id);
+
+CREATE TABLE IF NOT EXISTS station_aliases (
+    alias TEXT PRIMARY KEY,
+    station TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS geocodes (
+    query TEXT PRIMARY KEY,
+    lat TEXT,
+    lon TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+# Written to the sheet's "EID. No" cell of dispatches made from the console
+DISPATCH_REF_PREFIX = "RAPID-"
+
+
+def dispatch_ref(dispatch_id):
+    return f"{DISPATCH_REF_PREFIX}{dispatch_id}"
+
+
+class IncidentStore:
+    """
+    Local SQLite (WAL) copy of the processed sheet data and of every dispatched incident.
+    Google Sheets stays the system of record; this store is the fast local read/write path.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.environ.get('INCIDENT_DB_PATH', 'rapid100.db')
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Stores created before prefix_hash existed: the NULL hash forces one full rewrite per sheet
+            if "prefix_hash" not in [c[1] for c in conn.execute("PRAGMA table_info(sheet_meta)")]:
+                conn.execute("ALTER TABLE sheet_meta ADD COLUMN prefix_hash TEXT")
+            # ...and before dispatches could be dead-lettered
+            dispatch_columns = [c[1] for c in conn.execute("PRAGMA table_info(dispatches)")]
+            if "dead_at" not in dispatch_columns:
+                conn.execute("ALTER TABLE dispatches ADD COLUMN rejections INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE dispatches ADD COLUMN dead_at REAL")
+        logger.info(f"IncidentStore ready at {self.db_path}")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Processed sheet data ---
+    def save_sheet(self, sheet, payload):
+        """
+        Persists a processed {data, filters} payload.
+        If the stored rows are unchanged at the start of `data` (append-only tabs), only the new tail is inserted;
+        any edit, deletion or reorder in the stored rows rewrites the sheet.
+        """
+        data = payload.get("data") or []
+        filters_json = json.dumps(payload.get("filters") or {})
+        rows = [json.dumps(item, sort_keys=True) for item in data]
+        digest = hashlib.sha256()
+
+        def feed(chunk):
+            for row in chunk:
+                digest.update(row.encode("utf-8"))
+                digest.update(b"\n")
+
+        with self._write_lock, self._connect() as conn:
+            meta = conn.execute("SELECT row_count, prefix_hash FROM sheet_meta WHERE sheet = ?", (sheet,)).fetchone()
+            start = 0
+            if meta and meta[0] <= len(rows):
+                # Hash of everything stored so far, compared with the same number of rows from the new payload
+                feed(rows[:meta[0]])
+                if meta[1] is not None and digest.hexdigest() == meta[1]:
+                    start = meta[0]
+                feed(rows[meta[0]:])
+            else:
+                feed(rows)
+            if start == 0:
+                conn.execute("DELETE FROM records WHERE sheet = ?", (sheet,))
+            conn.executemany(
+                "INSERT INTO records (sheet, seq, payload) VALUES (?, ?, ?)",
+                ((sheet, seq, row) for seq, row in enumerate(rows[start:], start))
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sheet_meta (sheet, row_count, prefix_hash, filters, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (sheet, len(rows), digest.hexdigest(), filters_json, time.time())
+            )
+        logger.info(f"IncidentStore saved '{sheet}' ({len(rows) - start} new of {len(rows)} rows).")
+
+    def load_sheet(self, sheet):
+        """Returns the last persisted {data, filters} payload for `sheet`, or None."""
+        conn = self._connect()
+        meta = conn.execute("SELECT filters FROM sheet_meta WHERE sheet = ?", (sheet,)).fetchone()
+        if not meta:
+            return None
+        rows = conn.execute("SELECT payload FROM records WHERE sheet = ? ORDER BY seq", (sheet,)).fetchall()
+        return {"data": [json.loads(r[0]) for r in rows], "filters": json.loads(meta[0])}
+
+    # --- Dispatched incidents ---
+    def add_dispatch(self, sheet_row, payload, ref_column=None):
+        """
+        Journals a dispatch locally and returns its id.
+        With `ref_column`, that cell of `sheet_row` is set to dispatch_ref(id) (in place and in the journal),
+        so the row can be recognised when it comes back from the sheet.
+        """
+        with self._write_lock, self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO dispatches (created_at, sheet_row, payload) VALUES (?, ?, ?)",
+                (time.time(), json.dumps(sheet_row), json.dumps(payload))
+            )
+            if ref_column is not None:
+                sheet_row[ref_column] = dispatch_ref(cur.lastrowid)
+                conn.execute("UPDATE dispatches SET sheet_row = ? WHERE id = ?", (json.dumps(sheet_row), cur.lastrowid))
+            return cur.lastrowid
+
+    def pending_dispatches(self, limit=100):
+        """Returns [(id, created_at, sheet_row)] for dispatches not yet mirrored to Google Sheets, oldest first."""
+        rows = self._connect().execute(
+            "SELECT id, created_at, sheet_row FROM dispatches WHERE mirrored_at IS NULL AND dead_at IS NULL ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [(r[0], r[1], json.loads(r[2])) for r in rows]
+
+    def pending_summary(self):
+        """Returns (count, oldest created_at) of dispatches waiting to be mirrored."""
+        return self._connect().execute(
+            "SELECT COUNT(*), MIN(created_at) FROM dispatches WHERE mirrored_at IS NULL AND dead_at IS NULL"
+        ).fetchone()
+
+    def mark_mirrored(self, ids):
+        with self._write_lock, self._connect() as conn:
+            conn.executemany("UPDATE dispatches SET mirrored_at = ?, last_error = NULL WHERE id = ?", ((time.time(), i) for i in ids))
+
+    def mark_failed(self, ids, error):
+        with self._write_lock, self._connect() as conn:
+            conn.executemany("UPDATE dispatches SET attempts = attempts + 1, last_error = ? WHERE id = ?", ((str(error), i) for i in ids))
+
+    def mark_rejected(self, dispatch_id, max_rejections):
+        """
+        Counts one rejection of a dispatch sent on its own (after mark_failed has recorded the attempt).
+        At `max_rejections` it is dead-lettered: kept, but no longer pending. Returns True if that happened.
+        """
+        with self._write_lock, self._connect() as conn:
+            conn.execute("UPDATE dispatches SET rejections = rejections + 1 WHERE id = ?", (dispatch_id,))
+            cur = conn.execute("UPDATE dispatches SET dead_at = ? WHERE id = ? AND rejections >= ?", (time.time(), dispatch_id, max_rejections))
+            return cur.rowcount > 0
+
+    def dead_letters(self, limit=50):
+        """Returns the most recently dead-lettered dispatches as dicts (never mirrored; clear dead_at to retry one)."""
+        rows = self._connect().execute(
+            "SELECT id, created_at, dead_at, attempts, last_error, sheet_row FROM dispatches WHERE dead_at IS NOT NULL ORDER BY dead_at DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [{"id": r[0], "created_at": r[1], "dead_at": r[2], "attempts": r[3], "last_error": r[4], "sheet_row": json.loads(r[5])} for r in rows]
+
+    def dead_letter_count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM dispatches WHERE dead_at IS NOT NULL").fetchone()[0]
+
+    # --- Learned station aliases ---
+    def save_station_alias(self, alias, station):
+        with self._write_lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO station_aliases (alias, station, created_at) VALUES (?, ?, ?)", (alias, station, time.time()))
+
+    def load_station_aliases(self):
+        """Returns {alias: station} for every alias saved with save_station_alias."""
+        return dict(self._connect().execute("SELECT alias, station FROM station_aliases ORDER BY created_at").fetchall())
+
+    # --- Geocoding cache ---
+    def save_geocode(self, query, lat, lon):
+        """lat/lon None records that the query had no result."""
+        with self._write_lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO geocodes (query, lat, lon, created_at) VALUES (?, ?, ?, ?)", (query, lat, lon, time.time()))
+
+    def load_geocodes(self):
+        """Returns {query: (lat, lon, created_at)}."""
+        return {query: (lat, lon, created_at) for query, lat, lon, created_at in self._connect().execute("SELECT query, lat, lon, created_at FROM geocodes")}
+
+
+# Singleton instance
+incident_store = IncidentStore()
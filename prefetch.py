@@ -0,0 +1,71 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+
+class SheetPrefetcher:
+    """
+    Fetches and processes every sheet concurrently at boot, then again on a schedule,
+    so dashboard requests are answered from the in-memory cache.
+    """
+
+    def __init__(self, sheet_names, prefetch_fn, is_cached_fn, interval_seconds=None):
+        """
+        Args:
+            sheet_names (list): Sheets to keep warm.
+            prefetch_fn (callable): prefetch_fn(sheet_name) loads one sheet into the cache; raises if the source failed.
+            is_cached_fn (callable): is_cached_fn(sheet_name) -> True while some copy (possibly a stale store copy) is in memory.
+            interval_seconds (float): Seconds between scheduled refreshes (0 disables the schedule).
+        """
+        if interval_seconds is None:
+            interval_seconds = float(os.environ.get('SHEET_PREFETCH_INTERVAL_SECONDS', os.environ.get('SHEET_CACHE_TTL_SECONDS', 60)))
+        self.sheet_names = list(sheet_names)
+        self.prefetch_fn = prefetch_fn
+        self.is_cached_fn = is_cached_fn
+        self.interval_seconds = interval_seconds
+        self.last_run = {}
+        self.loaded = set()  # Sheets that have been fetched successfully at least once
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="sheet-prefetch", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.prefetch_all()
+            if self.interval_seconds <= 0:
+                return
+            time.sleep(self.interval_seconds)
+
+    def prefetch_all(self):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(self.sheet_names), thread_name_prefix="prefetch") as pool:
+            futures = {pool.submit(self.prefetch_fn, name): name for name in self.sheet_names}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                    self.last_run[name] = {"ok": True, "at": time.time()}
+                    self.loaded.add(name)
+                except Exception as e:
+                    logger.error(f"Prefetch failed for '{name}': {e}")
+                    self.last_run[name] = {"ok": False, "at": time.time(), "error": str(e)}
+        logger.info(f"Prefetched {len(self.sheet_names)} sheets in {time.monotonic() - started:.2f}s.")
+
+    def is_ready(self):
+        """True once every sheet has been fetched successfully (empty or not); a copy served from the local store alone does not count."""
+        return all(name in self.loaded for name in self.sheet_names)
+
+    def status(self):
+        return {
+            "ready": self.is_ready(),
+            "sheets": {name: {"cached": self.is_cached_fn(name), "loaded": name in self.loaded, **self.last_run.get(name, {})}
+                       for name in self.sheet_names},
+        }
@@ -0,0 +1,70 @@
+import logging
+import threading
+from collections import Counter
+from data_query import record_type_value, is_prefix
+
+logger = logging.getLogger(__name__)
+
+
+class RollupCube:
+    """
+    Pre-aggregated counts per (subdivision, type, sub_category, day) for one sheet.
+    Filter combinations are answered by summing cells instead of scanning rows.
+    """
+
+    def __init__(self):
+        self.cells = Counter()
+        self.rows = []  # The dataset list the cells were counted from (datasets are never mutated in place)
+
+    def add(self, records):
+        for item in records:
+            self.cells[(item.get('Subdivision'), record_type_value(item), item.get('SubCategory'), item.get('Date'))] += 1
+
+    def covers_prefix_of(self, data):
+        """True if every row this cube counted is still, unchanged, at the start of `data` (append-only growth)."""
+        return is_prefix(self.rows, data)
+
+    def query(self, date_from=None, date_to=None, subdivisions=None, types=None, sub_categories=None):
+        totals = {"total": 0, "by_subdivision": Counter(), "by_type": Counter(), "by_sub_category": Counter(), "by_date": Counter()}
+        subdivisions = set(subdivisions) if subdivisions is not None else None
+        types = set(types) if types is not None else None
+        sub_categories = set(sub_categories) if sub_categories is not None else None
+        for (subdivision, type_value, sub_category, day), count in self.cells.items():
+            if date_from and (not day or day < date_from): continue
+            if date_to and (not day or day > date_to): continue
+            if subdivisions is not None and subdivision not in subdivisions: continue
+            if types is not None and type_value not in types: continue
+            if sub_categories is not None and sub_category not in sub_categories: continue
+            totals["total"] += count
+            totals["by_subdivision"][subdivision or "Unknown"] += count
+            if type_value is not None: totals["by_type"][type_value] += count
+            if sub_category is not None: totals["by_sub_category"][sub_category] += count
+            if day: totals["by_date"][day] += count
+        totals["by_date"] = dict(sorted(totals["by_date"].items()))
+        return totals
+
+
+_cubes = {}
+_cube_lock = threading.Lock()
+
+
+def rollup_for(sheet_name, version, data):
+    """
+    Returns the RollupCube for this dataset version.
+    When the new version only appended rows, the previous cube is extended with the tail instead of rebuilt.
+    """
+    with _cube_lock:
+        cached = _cubes.get(sheet_name)
+        if cached and cached[0] == version:
+            return cached[1]
+        if cached and cached[1].covers_prefix_of(data):
+            previous = cached[1]
+            cube = RollupCube()
+            cube.cells = previous.cells.copy()
+            cube.add(data[len(previous.rows):])
+        else:
+            cube = RollupCube()
+            cube.add(data)
+        cube.rows = data
+        _cubes[sheet_name] = (version, cube)
+        return cube
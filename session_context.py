@@ -0,0 +1,66 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class SessionContext:
+    """Conversation memory of one caller (Socket.IO session) used to steer the AI prompt."""
+
+    def __init__(self, sid=None):
+        self.sid = sid
+        self.last_detected_language = None
+        self.incident_memory = None  # Stores {type, priority}
+        self.last_seen = time.monotonic()
+
+
+class SessionContextStore:
+    """
+    Per-sid SessionContext objects with TTL eviction.
+    Contexts are dropped on disconnect; idle ones expire after `ttl_seconds`, and at most `max_sessions` are kept.
+    """
+
+    def __init__(self, ttl_seconds=None, max_sessions=None):
+        self.ttl_seconds = ttl_seconds or float(os.environ.get('AI_SESSION_TTL_SECONDS', 1800))
+        self.max_sessions = max_sessions or int(os.environ.get('AI_SESSION_MAX', 1000))
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, sid):
+        """Returns the context for `sid`, creating it if needed, and marks it as recently used."""
+        now = time.monotonic()
+        with self._lock:
+            context = self._contexts.get(sid)
+            if context is None:
+                context = self._contexts[sid] = SessionContext(sid)
+            else:
+                self._contexts.move_to_end(sid)
+            context.last_seen = now
+            self._evict(now)
+            return context
+
+    def drop(self, sid):
+        with self._lock:
+            return self._contexts.pop(sid, None)
+
+    def _evict(self, now):
+        # Oldest-used first, so expired entries are always at the front
+        while self._contexts:
+            sid, context = next(iter(self._contexts.items()))
+            if len(self._contexts) <= self.max_sessions and now - context.last_seen < self.ttl_seconds:
+                break
+            del self._contexts[sid]
+            self.evicted += 1
+            logger.info(f"Evicted AI session context for {sid}.")
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._contexts), "max_sessions": self.max_sessions, "ttl_seconds": self.ttl_seconds, "evicted": self.evicted}
+
+
+# Singleton instance
+session_contexts = SessionContextStore()
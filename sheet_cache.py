@@ -0,0 +1,168 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    def __init__(self, value, version):
+        self.value = value
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    def age(self):
+        return time.monotonic() - self.loaded_at
+
+
+class SheetCache:
+    """
+    Per-sheet cache of the processed {data, filters} payload.
+
+    - Fresh entries (younger than the TTL) are served straight from memory.
+    - Stale entries are served immediately while ONE background refresh runs.
+    - Concurrent misses for the same sheet share a single in-flight load.
+    - Payloads carrying a `revision` (sheet_sync.SyncPayload) are ordered by it: once one is cached, only a
+      payload built from the same or a later revision replaces it, so a slow load or patch cannot roll it back.
+    """
+
+    def __init__(self, ttl_seconds=None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('SHEET_CACHE_TTL_SECONDS', 60))
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, force_refresh=False):
+        """
+        Returns the cached payload for `key`, loading it with `loader()` if needed.
+        Args:
+            key (str): Sheet name.
+            loader (callable): Zero-argument function returning the payload.
+            force_refresh (bool): Skip the fresh copy and wait for a new load.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not force_refresh:
+                if entry.age() >= self.ttl_seconds:
+                    # Stale-while-revalidate: hand back the old copy right away
+                    self._start_load(key, loader, background=True)
+                return entry.value
+            future, is_leader = self._start_load(key, loader, background=False)
+
+        if is_leader:
+            self._load(key, loader, future)
+        return future.result()
+
+    def refresh(self, key, loader):
+        """
+        Loads `key` now (joining a load already in flight) and returns the new payload.
+        Raises if the load failed; the cached copy is kept either way.
+        """
+        with self._lock:
+            future, is_leader = self._start_load(key, loader, background=False)
+        if is_leader:
+            self._load(key, loader, future)
+        value = future.result()
+        if getattr(future, "load_error", None) is not None:
+            raise future.load_error
+        return value
+
+    def peek(self, key):
+        """Returns the current CacheEntry for `key` (or None) without loading."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def patch(self, key, value):
+        """
+        Stores an in-place update of the current payload as a new version, keeping its age (the TTL refresh still runs on time).
+        With nothing cached yet, the patch is stored already stale, so the next get() still loads the full payload.
+        Returns the entry now cached, which is the existing one if it is newer than `value`.
+        """
+        with self._lock:
+            previous = self._entries.get(key)
+            if self._superseded(previous, value):
+                return previous
+            entry = self._store(key, value)
+            entry.loaded_at = previous.loaded_at if previous else entry.loaded_at - self.ttl_seconds
+            return entry
+
+    def seed(self, key, value):
+        """Stores `value` as an already-stale copy: it is served at once and refreshed on first use."""
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            entry = self._store(key, value)
+            entry.loaded_at -= self.ttl_seconds
+            return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                key: {"version": entry.version, "age_seconds": round(entry.age(), 1), "rows": len(entry.value.get("data", []))}
+                for key, entry in self._entries.items()
+            }
+
+    # --- Internals (caller must hold self._lock where noted) ---
+    def _start_load(self, key, loader, background):
+        """Registers an in-flight load for `key` (lock held). Returns (future, is_leader)."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._inflight[key] = future
+        if background:
+            threading.Thread(target=self._load, args=(key, loader, future), name=f"sheet-refresh-{key}", daemon=True).start()
+            return future, False
+        return future, True
+
+    def _load(self, key, loader, future):
+        started = time.monotonic()
+        try:
+            value = loader()
+        except Exception as e:
+            logger.error(f"Cache load failed for '{key}': {e}", exc_info=True)
+            with self._lock:
+                self._inflight.pop(key, None)
+                entry = self._entries.get(key)
+            if entry:
+                # Keep serving the last good copy; refresh() callers still see the error
+                future.load_error = e
+                future.set_result(entry.value)
+            else:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            previous = self._entries.get(key)
+            if self._superseded(previous, value):
+                # A patch built from a later revision landed while this load ran
+                logger.info(f"Load for '{key}' is older than cached version {previous.version}; keeping that.")
+                value = previous.value
+            else:
+                if previous and previous.value.get("data") and not value.get("data"):
+                    # Loaders raise when the source fails, so this is a tab that was really emptied
+                    logger.warning(f"Refresh for '{key}' returned no data; replacing cached version {previous.version}.")
+                entry = self._store(key, value)
+                logger.info(f"Cache updated for '{key}' (version {entry.version}, {time.monotonic() - started:.2f}s).")
+        future.set_result(value)
+
+    @staticmethod
+    def _superseded(entry, value):
+        """True if the cached entry carries a revision and `value` was built from an earlier one (or from none)."""
+        cached = getattr(entry.value, "revision", None) if entry else None
+        return cached is not None and getattr(value, "revision", -1) < cached
+
+    def _store(self, key, value):
+        previous = self._entries.get(key)
+        entry = CacheEntry(value, (previous.version + 1) if previous else 1)
+        self._entries[key] = entry
+        return entry
+
+
+# Singleton instance
+sheet_cache = SheetCache()
@@ -0,0 +1,94 @@
+import logging
+import threading
+from functools import lru_cache
+from gspread.utils import numericise as _numericise
+
+logger = logging.getLogger(__name__)
+
+# Cell strings repeat heavily (stations, SDOs, dates), and numericise is exception-driven
+numericise = lru_cache(maxsize=65536)(_numericise)
+
+# Logical field -> candidate column names, in `row.get(a) or row.get(b)` priority order
+FIELD_COLUMNS = {
+    'date': ['Date', 'Occurance Mon', 'DescriptionE'],
+    'event_type': ['Event type', 'Event type '],
+    'station': ['Police Station', 'Station'],
+    'sdos': ['SDOs'],
+    'sdo': ['SDO', 'SDOs'],
+    'description': ['Description'],
+    'ps_limit': ['PS Limit'],
+    'crime_type': ['Crime Type'],
+    'pocso_description': ['Description - Real /Elopment'],
+    'place_name': ['Name of the place'],
+    'dispatch_ref': ['EID. No', 'EID. No '],
+}
+
+
+class SheetSchema:
+    """
+    Column layout of one sheet header, resolved once.
+    Each logical field is bound to column positions so rows can be read as plain value lists
+    (get_all_values) with the same results as the dicts get_all_records builds.
+    """
+
+    def __init__(self, header):
+        self.header = list(header)
+        self.width = len(self.header)
+        # dict(zip(header, row)) semantics: a repeated name keeps its first position but the last column's value
+        self.columns = {name: i for i, name in enumerate(self.header)}
+        self.value_indexes = list(self.columns.values())
+        self.lat = next((i for name, i in self.columns.items() if 'lat' in str(name).lower()), None)
+        self.lon = next((i for name, i in self.columns.items() if 'lon' in str(name).lower() or 'long' in str(name).lower()), None)
+        self.lat_name = self.header[self.lat] if self.lat is not None else None
+        self.lon_name = self.header[self.lon] if self.lon is not None else None
+        self.fields = {field: [self.columns[name] for name in names if name in self.columns] for field, names in FIELD_COLUMNS.items()}
+
+    def pad(self, row):
+        """Pads/truncates a value row to the header width."""
+        if len(row) == self.width: return row
+        return list(row[:self.width]) + [""] * (self.width - len(row))
+
+    def is_empty(self, row):
+        return not any(str(row[i]).strip() for i in self.value_indexes)
+
+    @staticmethod
+    def value(row, index, default=None):
+        """Numericised cell value, or `default` when the column does not exist."""
+        return default if index is None else numericise(row[index])
+
+    def get(self, row, field, default=None):
+        """Value of a single-column field, like row.get(name, default)."""
+        indexes = self.fields[field]
+        return numericise(row[indexes[0]]) if indexes else default
+
+    def index(self, field):
+        """Position of a single-column field, or None when the sheet lacks it."""
+        indexes = self.fields[field]
+        return indexes[0] if indexes else None
+
+    def first(self, row, field):
+        """`row.get(a) or row.get(b) or ...` over the field's candidate columns."""
+        value = None
+        for index in self.fields[field]:
+            value = numericise(row[index])
+            if value: return value
+        return value
+
+    def record(self, row):
+        """Row as a {column: raw value} dict, for logging skipped rows."""
+        return dict(zip(self.header, self.pad(row)))
+
+
+_schemas = {}
+_schema_lock = threading.Lock()
+
+
+def schema_for(header):
+    """Returns the SheetSchema for `header`, resolving each distinct header only once."""
+    key = tuple(header)
+    with _schema_lock:
+        schema = _schemas.get(key)
+        if schema is None:
+            schema = _schemas[key] = SheetSchema(header)
+            logger.info(f"Resolved sheet schema: {len(schema.header)} columns, lat={schema.lat_name!r}, lon={schema.lon_name!r}.")
+        return schema
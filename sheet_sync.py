@@ -0,0 +1,154 @@
+import os
+import re
+import time
+import logging
+import threading
+from gspread.utils import rowcol_to_a1
+from sheet_schema import schema_for
+
+logger = logging.getLogger(__name__)
+
+
+def accumulate(acc, items):
+    """Folds processed records into the filter accumulators."""
+    for item in items:
+        acc["event_types"].add(item.get('EventType'))
+        acc["subdivisions"].add(item['Subdivision'])
+        date = item.get('Date')
+        if date:
+            if acc["min_date"] is None or date < acc["min_date"]: acc["min_date"] = date
+            if acc["max_date"] is None or date > acc["max_date"]: acc["max_date"] = date
+
+
+class SyncPayload(dict):
+    """
+    {data, filters} payload stamped with the sync revision it was built from.
+    The revision is an attribute, not a key, so it never reaches responses or the store.
+    """
+    revision = 0
+
+
+class IncrementalSheetSync:
+    """
+    Keeps an append-only tab in memory and only downloads the rows added since the last sync.
+    A full re-download runs every `reconcile_seconds` to pick up edits and deletions.
+    Rows written locally can be added "live" before they reach the sheet; each is keyed by the value of
+    the `live_key_field` column (a sheet_schema field) and dropped once a sync brings in the sheet row carrying the same key.
+    """
+
+    def __init__(self, record_type, process_fn, build_filters_fn, header_row=1, reconcile_seconds=None,
+                 live_key_field=None, default_header=None):
+        """
+        Args:
+            record_type (str): Type passed to process_fn (e.g. '100_calls').
+            process_fn (callable): process_records(header, rows, record_type, first_row_num=...).
+            build_filters_fn (callable): Builds the `filters` dict from the filter accumulators.
+            header_row (int): 1-based row holding the column names.
+            live_key_field (str): sheet_schema field identifying rows added with add_live().
+            default_header (list): Header used for live rows before the first sync has read the real one.
+        """
+        if reconcile_seconds is None:
+            reconcile_seconds = float(os.environ.get('SHEET_SYNC_RECONCILE_SECONDS', 900))
+        self.record_type = record_type
+        self.process_fn = process_fn
+        self.build_filters_fn = build_filters_fn
+        self.header_row = header_row
+        self.reconcile_seconds = reconcile_seconds
+        self.live_key_field = live_key_field
+        self.default_header = default_header
+        self.live = {}  # key -> processed records, in insertion order
+        self.revision = 0  # Bumped on every change; payloads carry it so an older one never replaces a newer
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.header = None
+        self.rows_synced = 0
+        self.last_full_sync = None
+        self.data = []
+        self.accumulators = {"event_types": set(), "subdivisions": set(), "min_date": None, "max_date": None}
+
+    def sync(self, worksheet):
+        """Brings the in-memory copy up to date with `worksheet` and returns {data, filters}."""
+        with self._lock:
+            # Without a header (empty tab) there is no column range to fetch incrementally
+            if self.header is None or self.last_full_sync is None or time.monotonic() - self.last_full_sync >= self.reconcile_seconds:
+                self._full_sync(worksheet)
+            else:
+                self._incremental_sync(worksheet)
+            self.revision += 1
+            return self.payload()
+
+    def payload(self):
+        data = self.data
+        if self.live:
+            data = data + [item for items in self.live.values() for item in items]
+        payload = SyncPayload(data=data, filters=self.build_filters_fn(self.accumulators) if data else {})
+        payload.revision = self.revision
+        return payload
+
+    @property
+    def loaded(self):
+        """False until a full sync has succeeded; before that, payload() holds live rows only, not the sheet."""
+        return self.last_full_sync is not None
+
+    def add_live(self, key, row):
+        """
+        Cleans one raw row (in sheet column order) that is not in the sheet yet and adds it to the dataset.
+        Returns the processed records (empty if the row was rejected) and the new payload,
+        or None instead of the payload while the sheet has not been loaded (merge the records onto another copy).
+        """
+        with self._lock:
+            processed = self.process_fn(self.header or self.default_header, [row], self.record_type, first_row_num=0)
+            if processed:
+                self.live[key] = processed
+                accumulate(self.accumulators, processed)
+                self.revision += 1
+            return processed, (self.payload() if self.loaded else None)
+
+    def _full_sync(self, worksheet):
+        values = worksheet.get_all_values()
+        self._reset()
+        if len(values) < self.header_row:
+            self.last_full_sync = time.monotonic()
+            return
+        self.header = values[self.header_row - 1]
+        rows = values[self.header_row:]
+        self._merge(rows)
+        # _reset() cleared the accumulators; live rows still missing from the sheet count towards them
+        accumulate(self.accumulators, [item for items in self.live.values() for item in items])
+        self.last_full_sync = time.monotonic()
+        logger.info(f"Full sync of {self.record_type}: {self.rows_synced} rows.")
+
+    def _incremental_sync(self, worksheet):
+        start_row = self.header_row + self.rows_synced + 1
+        last_col = re.sub(r'\d', '', rowcol_to_a1(1, len(self.header)))
+        rows = list(worksheet.get(f"A{start_row}:{last_col}"))
+        # An empty range comes back as [[]]; blank rows past the end must not count as synced.
+        # Blank rows between data rows still count, so rows_synced keeps matching sheet positions.
+        while rows and not any(rows[-1]):
+            rows.pop()
+        if not rows:
+            return
+        self._merge(rows)
+        logger.info(f"Incremental sync of {self.record_type}: {len(rows)} new rows (total {self.rows_synced}).")
+
+    def _merge(self, rows):
+        first_row_num = self.header_row + self.rows_synced + 1
+        processed = self.process_fn(self.header, rows, self.record_type, first_row_num=first_row_num)
+        self.rows_synced += len(rows)
+        self._retire_live(rows)
+        if not processed:
+            return
+        accumulate(self.accumulators, processed)
+        # New list so payloads already handed out are never mutated underneath a response
+        self.data = self.data + processed
+
+    def _retire_live(self, rows):
+        """Drops live records whose row has now arrived from the sheet (lock held)."""
+        if not self.live or not self.header: return
+        column = schema_for(self.header).index(self.live_key_field)
+        if column is None: return
+        for row in rows:
+            if len(row) > column and self.live.pop(row[column], None) is not None:
+                logger.info(f"Live {self.record_type} row {row[column]} now present in the sheet.")
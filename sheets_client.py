@@ -0,0 +1,119 @@
+import os
+import json
+import logging
+import threading
+import gspread
+from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# FULL ACCESS required for writing
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+
+
+def is_rejection(error):
+    """
+    True if Sheets refused the request itself (400 INVALID_ARGUMENT, e.g. a malformed value), so sending it again unchanged fails again.
+    Outages, rate limits and auth/permission errors are not rejections.
+    """
+    return isinstance(error, gspread.exceptions.APIError) and error.code == 400
+
+
+class SheetsGateway:
+    """
+    Thread-safe access to Google Sheets.
+    - One authorized client per process over a pooled HTTP session (tokens refresh transparently).
+    - Spreadsheet/Worksheet handles cached by (workbook, tab), so open()/worksheet() lookups happen once.
+    """
+
+    def __init__(self):
+        self.pool_size = int(os.environ.get('SHEETS_HTTP_POOL_SIZE', 10))
+        self.timeout = float(os.environ.get('SHEETS_HTTP_TIMEOUT_SECONDS', 30))
+        self._client = None
+        self._auth_failed = False
+        self._spreadsheets = {}
+        self._worksheets = {}
+        self._lock = threading.RLock()
+
+    def client(self):
+        """Returns the shared gspread client, or None if authentication is not possible."""
+        with self._lock:
+            if self._client is None and not self._auth_failed:
+                self._client = self._authorize()
+                self._auth_failed = self._client is None
+            return self._client
+
+    def _authorize(self):
+        try:
+            if 'GSPREAD_SERVICE_ACCOUNT' in os.environ:
+                creds_json = json.loads(os.environ['GSPREAD_SERVICE_ACCOUNT'])
+                creds = Credentials.from_service_account_info(creds_json, scopes=SCOPES)
+                logger.info("Successfully authenticated with Google Sheets from environment variable.")
+            else:
+                creds = Credentials.from_service_account_file('credentials.json', scopes=SCOPES)
+                logger.info("Successfully authenticated with Google Sheets from credentials.json file.")
+        except FileNotFoundError:
+            logger.error("CRITICAL: 'credentials.json' file not found and GSPREAD_SERVICE_ACCOUNT env var not set. Cannot connect to Google Sheets.")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to authenticate with Google Sheets: {e}")
+            return None
+
+        # AuthorizedSession refreshes the access token on expiry; the adapter keeps connections alive across calls
+        session = AuthorizedSession(creds)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        client = gspread.Client(auth=creds, session=session)
+        client.set_timeout(self.timeout)
+        return client
+
+    def spreadsheet(self, workbook):
+        with self._lock:
+            sh = self._spreadsheets.get(workbook)
+            if sh is None:
+                client = self.client()
+                if client is None:
+                    raise RuntimeError("Google Sheets client unavailable")
+                sh = self._spreadsheets[workbook] = client.open(workbook)
+            return sh
+
+    def worksheet(self, workbook, tab):
+        """Returns the cached Worksheet handle for (workbook, tab)."""
+        with self._lock:
+            ws = self._worksheets.get((workbook, tab))
+            if ws is None:
+                ws = self._worksheets[(workbook, tab)] = self.spreadsheet(workbook).worksheet(tab)
+            return ws
+
+    def invalidate(self, workbook, tab=None):
+        with self._lock:
+            if tab is None:
+                self._spreadsheets.pop(workbook, None)
+                for key in [k for k in self._worksheets if k[0] == workbook]:
+                    del self._worksheets[key]
+            else:
+                self._worksheets.pop((workbook, tab), None)
+
+    def call(self, workbook, tab, fn, idempotent=True):
+        """
+        Runs fn(worksheet) with the cached handle.
+        If the handle went stale (tab renamed/recreated), it is dropped and the call retried once.
+        Writes that may already have been applied when the error surfaced (appends) pass idempotent=False:
+        the handle is still refreshed for the next call, but the error is raised instead of repeating the write.
+        """
+        ws = self.worksheet(workbook, tab)
+        try:
+            return fn(ws)
+        except (gspread.exceptions.APIError, gspread.exceptions.WorksheetNotFound) as e:
+            self.invalidate(workbook)
+            if not idempotent:
+                logger.warning(f"Sheets write on '{workbook}/{tab}' failed ({e}). Handle refreshed; not retrying.")
+                raise
+            logger.warning(f"Sheets call on '{workbook}/{tab}' failed ({e}). Refreshing handle and retrying.")
+            return fn(self.worksheet(workbook, tab))
+
+
+# Singleton instance
+sheets = SheetsGateway()
@@ -0,0 +1,114 @@
+import math
+import logging
+import threading
+from data_query import is_prefix
+
+logger = logging.getLogger(__name__)
+
+MIN_ZOOM = 8
+MAX_ZOOM = 18
+# Each 256px map tile is split into CELLS_PER_TILE x CELLS_PER_TILE cluster cells (64px at the default of 4)
+CELLS_PER_TILE = 4
+
+
+def project(lat, lon):
+    """Web Mercator projection to [0, 1) x [0, 1)."""
+    x = (lon + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(max(-85.05, min(85.05, lat))))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def clamp_zoom(zoom):
+    return max(MIN_ZOOM, min(MAX_ZOOM, int(zoom)))
+
+
+def cell_range(bbox, zoom):
+    """Cell index bounds (x0, y0, x1, y1) covering bbox = (minLon, minLat, maxLon, maxLat)."""
+    scale = (1 << zoom) * CELLS_PER_TILE
+    min_lon, min_lat, max_lon, max_lat = bbox
+    x0, y1 = project(min_lat, min_lon)
+    x1, y0 = project(max_lat, max_lon)
+    return int(x0 * scale), int(y0 * scale), int(x1 * scale), int(y1 * scale)
+
+
+def bin_points(data, positions, zoom):
+    """Groups rows into cells at `zoom`: {(cx, cy): (count, sum_lat, sum_lon, first_pos)}."""
+    scale = (1 << zoom) * CELLS_PER_TILE
+    cells = {}
+    for pos in positions:
+        item = data[pos]
+        lat, lon = item['Latitude'], item['Longitude']
+        x, y = project(lat, lon)
+        key = (int(x * scale), int(y * scale))
+        cell = cells.get(key)
+        cells[key] = (cell[0] + 1, cell[1] + lat, cell[2] + lon, cell[3]) if cell else (1, lat, lon, pos)
+    return cells
+
+
+def cells_to_response(data, cells, zoom):
+    """Singleton cells are returned as full records; the rest as weighted centroids."""
+    clusters, points = [], []
+    for (cx, cy), (count, sum_lat, sum_lon, pos) in cells.items():
+        if count == 1:
+            points.append(data[pos])
+        else:
+            clusters.append({"lat": sum_lat / count, "lon": sum_lon / count, "count": count})
+    return {"zoom": zoom, "clusters": clusters, "points": points}
+
+
+class GridIndex:
+    """Per-zoom grid of pre-clustered cells over one dataset, so viewport queries never scan all rows."""
+
+    def __init__(self, data):
+        self.data = data
+        self.levels = {zoom: {} for zoom in range(MIN_ZOOM, MAX_ZOOM + 1)}
+        self.row_count = 0
+        self.add(data, 0)
+
+    def add(self, records, start_pos):
+        # Project once, then bin the same coordinates at every zoom level
+        projected = [(project(item['Latitude'], item['Longitude']), item['Latitude'], item['Longitude']) for item in records]
+        for zoom, level in self.levels.items():
+            scale = (1 << zoom) * CELLS_PER_TILE
+            for pos, ((x, y), lat, lon) in enumerate(projected, start_pos):
+                key = (int(x * scale), int(y * scale))
+                cell = level.get(key)
+                level[key] = (cell[0] + 1, cell[1] + lat, cell[2] + lon, cell[3]) if cell else (1, lat, lon, pos)
+        self.row_count = start_pos + len(records)
+
+    def extended(self, data):
+        """Returns a new index for `data` that reuses this one when `data` only appended rows."""
+        if not is_prefix(self.data, data):
+            return GridIndex(data)
+        grown = GridIndex.__new__(GridIndex)
+        grown.data = data
+        grown.levels = {zoom: dict(level) for zoom, level in self.levels.items()}
+        grown.add(data[self.row_count:], self.row_count)
+        return grown
+
+    def clusters(self, bbox, zoom):
+        zoom = clamp_zoom(zoom)
+        level = self.levels[zoom]
+        x0, y0, x1, y1 = cell_range(bbox, zoom)
+        span = (x1 - x0 + 1) * (y1 - y0 + 1)
+        if span <= len(level):
+            cells = {(cx, cy): level[(cx, cy)] for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1) if (cx, cy) in level}
+        else:
+            cells = {key: cell for key, cell in level.items() if x0 <= key[0] <= x1 and y0 <= key[1] <= y1}
+        return cells_to_response(self.data, cells, zoom)
+
+
+_grids = {}
+_grid_lock = threading.Lock()
+
+
+def grid_for(sheet_name, version, data):
+    """Returns the GridIndex for this dataset version, extending the previous one for appended rows."""
+    with _grid_lock:
+        cached = _grids.get(sheet_name)
+        if cached and cached[0] == version:
+            return cached[1]
+        grid = cached[1].extended(data) if cached else GridIndex(data)
+        _grids[sheet_name] = (version, grid)
+        return grid
@@ -127,15 +127,13 @@ document.addEventListener('DOMContentLoaded', () => {
 
                     // Send if large enough (Simple size check, no volume gate)
                     if (audioBlob.size > 3000) { // > 3KB
-                        const reader = new FileReader();
-                        reader.readAsDataURL(audioBlob);
-                        reader.onloadend = () => {
-                            const base64data = reader.result.split(',')[1];
+                        // Raw bytes travel as a Socket.IO binary attachment (no base64 data URL)
+                        audioBlob.arrayBuffer().then((buffer) => {
                             if (socket.connected) {
                                 console.log(`Sending chunk: ${(audioBlob.size / 1024).toFixed(2)} KB`);
-                                socket.emit('audio_stream', { audio: base64data });
+                                socket.emit('audio_stream', { audio: buffer });
                             }
-                        };
+                        });
                     } else {
                         console.log("Skipping small chunk (silence)");
                     }
@@ -365,25 +363,7 @@ document.addEventListener('DOMContentLoaded', () => {
             document.getElementById('response-script-container').style.display = 'block';
             document.getElementById('script-text').textContent = data.suggested_response;
 
-            // Auto-speak the response using Backend TTS (Cloud API)
-            if (data.audio_response) {
-                console.log("Received audio response from backend. Length:", data.audio_response.length);
-                try {
-                    const audioSrc = "data:audio/mp3;base64," + data.audio_response;
-                    const audio = new Audio(audioSrc);
-                    audio.play().then(() => {
-                        console.log("Audio started playing successfully.");
-                    }).catch(e => {
-                        console.error("Audio play failed (Autoplay policy?):", e);
-                        alert("Audio playback blocked by browser. Please interact with the page first.");
-                    });
-                } catch (e) {
-                    console.error("Error creating audio object:", e);
-                }
-            } else {
-                console.log("No audio response from backend.");
-            }
-
+            // Backend TTS (Cloud API) audio arrives separately as 'tts_*' events
             // speakResponse(); // Disabled browser TTS in favor of Cloud TTS
         }
 
@@ -398,6 +378,85 @@ document.addEventListener('DOMContentLoaded', () => {
         handleAnalysisResult(data);
     });
 
+    // --- Streamed Cloud TTS playback ---
+    // Binary MP3 chunks are appended to a MediaSource as they arrive, so playback starts with the first sentence.
+    // Browsers without MediaSource MP3 support play the assembled Blob once the stream ends.
+    const ttsStreams = {};
+    let currentTtsAudio = null;
+
+    function playTtsAudio(audio) {
+        if (currentTtsAudio) currentTtsAudio.pause(); // Stop previous
+        currentTtsAudio = audio;
+        audio.play().then(() => {
+            console.log("Audio started playing successfully.");
+        }).catch(e => {
+            console.error("Audio play failed (Autoplay policy?):", e);
+            alert("Audio playback blocked by browser. Please interact with the page first.");
+        });
+    }
+
+    function createTtsPlayer(mime) {
+        if (window.MediaSource && MediaSource.isTypeSupported(mime)) {
+            const mediaSource = new MediaSource();
+            const audio = new Audio(URL.createObjectURL(mediaSource));
+            const pending = [];
+            let sourceBuffer = null;
+            let ended = false;
+            let started = false;
+
+            const flush = () => {
+                if (!sourceBuffer || sourceBuffer.updating) return;
+                if (pending.length) {
+                    sourceBuffer.appendBuffer(pending.shift());
+                } else if (ended && mediaSource.readyState === 'open') {
+                    mediaSource.endOfStream();
+                }
+            };
+            mediaSource.addEventListener('sourceopen', () => {
+                sourceBuffer = mediaSource.addSourceBuffer(mime);
+                sourceBuffer.mode = 'sequence';
+                sourceBuffer.addEventListener('updateend', flush);
+                flush();
+            });
+            return {
+                append(data) {
+                    pending.push(data);
+                    flush();
+                    if (!started) {
+                        started = true;
+                        playTtsAudio(audio);
+                    }
+                },
+                end() {
+                    ended = true;
+                    flush();
+                }
+            };
+        }
+
+        const chunks = [];
+        return {
+            append(data) { chunks.push(data); },
+            end() { playTtsAudio(new Audio(URL.createObjectURL(new Blob(chunks, { type: mime })))); }
+        };
+    }
+
+    socket.on('tts_start', (msg) => {
+        console.log("Receiving audio response from backend:", msg.id);
+        ttsStreams[msg.id] = createTtsPlayer(msg.mime);
+    });
+
+    socket.on('tts_chunk', (msg) => {
+        const player = ttsStreams[msg.id];
+        if (player) player.append(msg.data);
+    });
+
+    socket.on('tts_end', (msg) => {
+        const player = ttsStreams[msg.id];
+        if (player) player.end();
+        delete ttsStreams[msg.id];
+    });
+
     socket.on('connect', () => {
         console.log("Connected to server via WebSocket");
     });
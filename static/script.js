@@ -48,6 +48,7 @@ document.addEventListener('DOMContentLoaded', () => {
     async function initializeApp() {
         applyTheme();
         setupGeneralEventListeners();
+        subscribeToNewIncidents();
         await loadAllBoundaries();
         await switchDataset(currentSheet);
     }
@@ -56,7 +57,7 @@ document.addEventListener('DOMContentLoaded', () => {
         loadingOverlay.style.display = isloading ? 'flex' : 'none';
     }
 
-    async function switchDataset(sheetName) {
+    async function switchDataset(sheetName, forceRefresh = false) {
         currentSheet = sheetName;
         document.querySelectorAll('.tab-button').forEach(btn => btn.classList.toggle('active', btn.dataset.sheet === sheetName));
         resetFilters(false);
@@ -69,14 +70,15 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         showLoading(true);
         try {
-            const response = await fetch(`/api/data/${sheetName}`);
+            // Only the filter metadata here; updateMap() asks the server for the filtered slice
+            const response = await fetch(`/api/data/${sheetName}?limit=0${forceRefresh ? '&refresh=1' : ''}`);
             if (!response.ok) throw new Error(`API error ${response.status}: ${response.statusText}`);
             const sheetData = await response.json();
             if (sheetData.error) throw new Error(sheetData.error);
 
             currentSheetData = sheetData;
             renderUIForCurrentSheet();
-            updateMap();
+            await updateMap();
             const now = new Date();
             lastUpdatedContainer.innerHTML = `<span>Updated: ${now.toLocaleTimeString()}</span>`;
         } catch (error) {
@@ -84,12 +86,54 @@ document.addEventListener('DOMContentLoaded', () => {
             currentSheetData = {};
             alert(`Could not load data for ${sheetName}. Check console for details.`);
             lastUpdatedContainer.innerHTML = `<span class="error">Update failed</span>`;
-            clearAllLayers(); renderUIForCurrentSheet(); displayAnalytics([]);
+            clearAllLayers(); renderUIForCurrentSheet(); renderAnalytics(null);
         } finally {
             showLoading(false);
         }
     }
 
+    // New dispatches are pushed over Socket.IO; the server has already added them to the dataset,
+    // so refreshing the current filtered view (without moving the map) is enough.
+    function subscribeToNewIncidents() {
+        if (typeof io === 'undefined') return;
+        const socket = io();
+        let analyticsTimer = null;
+        socket.on('connect', () => socket.emit('join_dashboard'));  // Re-join after reconnects
+        socket.on('new_incident', msg => {
+            if (msg.sheet !== currentSheet || !currentSheetData.filters) return;
+            currentSheetData.filters = msg.filters;
+            const mapView = document.querySelector('input[name="mapView"]:checked').value;
+            const matching = msg.records.filter(matchesFilters);
+            if (mapView === 'point') drawPointMap(matching);
+            else if (mapView === 'heat') {
+                if (heatLayer) matching.forEach(item => heatLayer.addLatLng([item.Latitude, item.Longitude, 0.5]));
+                else drawHeatMap(matching);
+            }
+            lastUpdatedContainer.innerHTML = `<span>Updated: ${new Date().toLocaleTimeString()} (live)</span>`;
+            if (mapView !== 'cluster' && matching.length === 0) return;
+            clearTimeout(analyticsTimer);  // Coalesce bursts of dispatches into one refetch of the aggregate views
+            analyticsTimer = setTimeout(() => {
+                displayAnalytics();
+                if (mapView === 'cluster') drawClusterMap();
+            }, 500);
+        });
+    }
+
+    // Client-side copy of the server's filter semantics, for records pushed over the socket
+    function matchesFilters(item) {
+        const params = buildFilterQuery();
+        const subdivisions = params.getAll('subdivisions');
+        if (subdivisions.length && !subdivisions.includes(item.Subdivision)) return false;
+        const type = params.get('types');
+        if (type && (item.EventType || item.CrimeType) !== type) return false;
+        const from = params.get('from'), to = params.get('to');
+        if ((from || to) && !item.Date) return false;
+        if (from && item.Date < from) return false;
+        if (to && item.Date > to) return false;
+        if (params.has('sub_categories') && !params.getAll('sub_categories').includes(item.SubCategory)) return false;
+        return true;
+    }
+
     function renderUIForCurrentSheet() {
         const filters = currentSheetData.filters || {};
         const hasSubdivisions = filters.subdivisions && filters.subdivisions.length > 0;
@@ -122,43 +166,69 @@ document.addEventListener('DOMContentLoaded', () => {
         } else { subCategorySection.innerHTML = ''; }
     }
 
-    function applyFilters() {
-        if (!currentSheetData || !currentSheetData.data) return [];
-        let dataToFilter = [...currentSheetData.data];
+    // Mirrors the filter controls into /api/data query parameters; filtering runs server-side.
+    // Lists are sent as repeated keys, since type names can contain commas.
+    function buildFilterQuery() {
+        const params = new URLSearchParams();
         const filters = currentSheetData.filters || {};
         const activeListItems = document.querySelectorAll('.subdivision-list-item.active');
-        if (activeListItems.length > 0) {
-            const selectedValues = Array.from(activeListItems).map(item => item.dataset.value);
-            const key = 'Subdivision';
-            dataToFilter = dataToFilter.filter(item => selectedValues.includes(item[key]));
-        }
+        activeListItems.forEach(item => params.append('subdivisions', item.dataset.value));
         if (filters.event_types || filters.crime_types) {
             const activeCrimeBtn = document.querySelector('#crime-buttons-container .filter-btn.active');
-            if (activeCrimeBtn && activeCrimeBtn.dataset.crime !== 'All') {
-                const crimeKey = currentSheet === 'Robbrey-theft' ? 'CrimeType' : 'EventType';
-                dataToFilter = dataToFilter.filter(item => item[crimeKey] === activeCrimeBtn.dataset.crime);
-            }
+            if (activeCrimeBtn && activeCrimeBtn.dataset.crime !== 'All') params.set('types', activeCrimeBtn.dataset.crime);
         }
         if (filters.date_range) {
             const fromDateStr = document.getElementById('fromDate').value, toDateStr = document.getElementById('toDate').value;
-            if (fromDateStr) dataToFilter = dataToFilter.filter(item => item.Date >= fromDateStr);
-            if (toDateStr) dataToFilter = dataToFilter.filter(item => item.Date <= toDateStr);
+            if (fromDateStr) params.set('from', fromDateStr);
+            if (toDateStr) params.set('to', toDateStr);
         }
         if (currentSheet === 'Hurt' || currentSheet === 'POCSO') {
             const selectedSubCats = Array.from(document.querySelectorAll('.sub-category-filter:checked')).map(cb => cb.value);
-            if (selectedSubCats.length > 0) {
-                dataToFilter = dataToFilter.filter(item => selectedSubCats.includes(item.SubCategory));
-            } else {
-                dataToFilter = [];
+            if (selectedSubCats.length === 0) params.set('sub_categories', '');  // Present but empty: match nothing
+            selectedSubCats.forEach(value => params.append('sub_categories', value));
+        }
+        return params;
+    }
+
+    // Only the fields each view draws (popup + styling); the heatmap needs coordinates alone
+    const POINT_FIELDS = {
+        '100_calls_new': ['EventType', 'Subdivision', 'PoliceStation', 'Date'],
+        'Robbrey-theft': ['CrimeType', 'Station', 'Subdivision', 'Date'],
+        'Hurt': ['SubCategory', 'Subdivision', 'Station'],
+        'POCSO': ['SubCategory', 'Subdivision', 'PS_Limit'],
+        'CCTV': ['Place_Name', 'Subdivision', 'Status'],
+    };
+    const PAGE_SIZE = 5000, MAX_MAP_POINTS = 50000;
+
+    let filterRequestId = 0;
+    async function applyFilters(mapView) {
+        if (!currentSheetData || !currentSheetData.filters) return null;
+        const requestId = ++filterRequestId;
+        const params = buildFilterQuery();
+        ['Latitude', 'Longitude', ...(mapView === 'heat' ? [] : POINT_FIELDS[currentSheet] || [])].forEach(f => params.append('fields', f));
+        params.set('limit', PAGE_SIZE);
+        const rows = [];
+        while (true) {
+            const response = await fetch(`/api/data/${currentSheet}?${params.toString()}`);
+            if (!response.ok) throw new Error(`API error ${response.status}: ${response.statusText}`);
+            const result = await response.json();
+            // A newer filter change superseded this request
+            if (requestId !== filterRequestId) return null;
+            rows.push(...(result.data || []));
+            if (result.next_cursor === null || result.next_cursor === undefined) break;
+            if (rows.length >= MAX_MAP_POINTS) {
+                console.warn(`Showing the first ${rows.length} of ${result.total} matching rows; narrow the filters to see the rest.`);
+                break;
             }
+            params.set('cursor', result.next_cursor);
         }
-        return dataToFilter;
+        return rows;
     }
 
     function setupGeneralEventListeners() {
         themeToggle.addEventListener('click', () => { body.classList.toggle('dark-mode'); localStorage.setItem('theme', body.classList.contains('dark-mode') ? 'dark' : 'light'); applyTheme(); });
         document.querySelector('.tab-switcher').addEventListener('click', e => { if (e.target.classList.contains('tab-button') && !e.target.classList.contains('active')) switchDataset(e.target.dataset.sheet); });
-        refreshButton.addEventListener('click', () => switchDataset(currentSheet));
+        refreshButton.addEventListener('click', () => switchDataset(currentSheet, true));
         exportButton.addEventListener('click', () => {
             showLoading(true);
             leafletImage(map, (err, canvas) => {
@@ -200,7 +270,8 @@ document.addEventListener('DOMContentLoaded', () => {
         document.getElementById('toDate').addEventListener('change', updateMap);
         document.getElementById('heatmap-radius').addEventListener('input', e => { document.getElementById('radius-value').textContent = e.target.value; if (heatLayer) heatLayer.setOptions({ radius: e.target.value, blur: e.target.value / 2 }); });
         document.getElementById('resetFilters').addEventListener('click', () => resetFilters(true));
-        map.on('zoomend', () => { const show = map.getZoom() <= 11; document.querySelectorAll('.boundary-label').forEach(l => l.style.opacity = show ? 1 : 0); });
+        map.on('moveend', () => { if (document.querySelector('input[name="mapView"]:checked').value === 'cluster') drawClusterMap(); });
+        map.on('zoomend', () => { const show = map.getZoom() <= 11; document.querySelectorAll('.boundary-label').forEach(l => l.style.opacity = show ? 1 : 0); drawBoundaries(); });
     }
 
     function resetFilters(triggerUpdate = true) {
@@ -213,7 +284,7 @@ document.addEventListener('DOMContentLoaded', () => {
         document.querySelectorAll('.sub-category-filter').forEach(cb => cb.checked = true);
         document.getElementById('fromDate').value = ''; document.getElementById('toDate').value = '';
         document.querySelector('input[name="mapView"][value="point"]').checked = true;
-        highlightLayer.clearLayers();
+        highlightSubdivision([]);
         if (triggerUpdate) {
             // map.setView([8.78, 78.13], 10);
             updateMap();
@@ -224,14 +295,55 @@ document.addEventListener('DOMContentLoaded', () => {
         document.getElementById('subdivision-list-container').innerHTML = options.map(opt => `<div class="subdivision-list-item" data-value="${opt}">${opt}</div>`).join('');
     }
 
+    // Subdivision boundaries: one bundle (all subdivisions, per-zoom simplification, quantised + delta-encoded rings)
+    const BOUNDARY_STYLE = { fill: false, weight: 1.5, opacity: 0.8, color: '#333333', dashArray: '5, 5' };
+    let boundaryBundle = null, boundaryLevel = null, boundaryOutline = null, highlightedNames = [];
+
+    function decodeBoundaryLevel(level) {
+        const [sx, sy] = boundaryBundle.transform.scale, [tx, ty] = boundaryBundle.transform.translate;
+        const decodeRing = ring => {
+            const coords = [];
+            let x = 0, y = 0;
+            for (let i = 0; i < ring.length; i += 2) {
+                x += ring[i]; y += ring[i + 1];
+                coords.push([x * sx + tx, y * sy + ty]);
+            }
+            return coords;
+        };
+        return {
+            type: 'FeatureCollection',
+            features: level.features.map(f => ({
+                type: 'Feature',
+                properties: { SD_NAME: f.name },
+                geometry: { type: 'MultiPolygon', coordinates: f.polygons.map(polygon => polygon.map(decodeRing)) }
+            }))
+        };
+    }
+
+    function boundaryLevelFor(zoom) {
+        const levels = boundaryBundle.levels;
+        const level = levels.find(l => zoom <= l.max_zoom) || levels[levels.length - 1];
+        if (!level.geojson) level.geojson = decodeBoundaryLevel(level);
+        return level;
+    }
+
+    function drawBoundaries() {
+        if (!boundaryBundle) return;
+        const level = boundaryLevelFor(map.getZoom());
+        if (level === boundaryLevel) return;
+        boundaryLevel = level;
+        if (boundaryOutline) map.removeLayer(boundaryOutline);
+        boundaryOutline = L.geoJSON(level.geojson, { style: BOUNDARY_STYLE }).addTo(map);
+        highlightSubdivision(highlightedNames);
+    }
+
     async function loadAllBoundaries() {
         try {
-            const response = await fetch(`/static/geojson/THOOTHUKUDI-POLICE-MAP-OUTLINE.geojson`);
-            if (!response.ok) throw new Error(`Status ${response.status}: Failed to fetch main boundary file.`);
-            const geojsonData = await response.json();
-            const style = { fill: false, weight: 1.5, opacity: 0.8, color: '#333333', dashArray: '5, 5' };
-            L.geoJSON(geojsonData, { style }).addTo(map);
-            geojsonData.features.forEach(feature => {
+            const response = await fetch(window.BOUNDARY_BUNDLE_URL || '/api/boundaries');
+            if (!response.ok) throw new Error(`Status ${response.status}: Failed to fetch boundary bundle.`);
+            boundaryBundle = await response.json();
+            drawBoundaries();
+            boundaryLevelFor(0).geojson.features.forEach(feature => {
                 const name = feature.properties.SD_NAME;
                 if (name) {
                     const center = L.geoJSON(feature).getBounds().getCenter();
@@ -244,29 +356,35 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    async function highlightSubdivision(sdoNames) {
+    function highlightSubdivision(sdoNames) {
         highlightLayer.clearLayers();
-        if (!sdoNames || sdoNames.length === 0) return;
-        const names = Array.isArray(sdoNames) ? sdoNames : [sdoNames];
-        for (const name of names) {
-            const filename = name.toLowerCase().replace(/\s+/g, '') + '.geojson';
-            try {
-                const response = await fetch(`/static/geojson/${filename}`);
-                if (!response.ok) throw new Error(`File not found`);
-                const geojsonData = await response.json();
-                highlightLayer.addData(geojsonData);
-            } catch (error) { console.warn(`Could not load boundary for ${name}`); }
-        }
+        highlightedNames = !sdoNames ? [] : (Array.isArray(sdoNames) ? sdoNames : [sdoNames]);
+        if (!boundaryLevel || highlightedNames.length === 0) return;
+        const features = boundaryLevel.geojson.features.filter(f => highlightedNames.includes(f.properties.SD_NAME));
+        if (features.length) highlightLayer.addData({ type: 'FeatureCollection', features });
+        else console.warn(`Could not load boundary for ${highlightedNames.join(', ')}`);
     }
 
-    function updateMap() {
-        clearAllLayers();
-        const filteredData = applyFilters();
-        displayAnalytics(filteredData);
+    async function updateMap() {
         const mapView = document.querySelector('input[name="mapView"]:checked').value;
         document.getElementById('heatmap-options').style.display = mapView === 'heat' ? 'block' : 'none';
+        if (mapView === 'cluster') {
+            // Clusters are computed server-side for the visible viewport only
+            displayAnalytics();
+            await drawClusterMap();
+            return;
+        }
+        let filteredData;
+        try {
+            filteredData = await applyFilters(mapView);
+        } catch (error) {
+            console.error(`Failed to filter ${currentSheet}:`, error);
+            filteredData = [];
+        }
+        if (filteredData === null) return;
+        clearAllLayers();
+        displayAnalytics();
         if (mapView === 'point') drawPointMap(filteredData);
-        else if (mapView === 'cluster') drawClusterMap(filteredData);
         else if (mapView === 'heat') drawHeatMap(filteredData);
 
         if (filteredData.length > 0) {
@@ -312,14 +430,35 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    function drawClusterMap(data) {
-        clusterLayerGroup = L.markerClusterGroup();
-        data.forEach(item => {
+    async function drawClusterMap() {
+        if (!currentSheetData || !currentSheetData.filters) return;
+        const requestId = ++filterRequestId;
+        const params = buildFilterQuery();
+        params.set('bbox', map.getBounds().toBBoxString());
+        params.set('zoom', map.getZoom());
+        let result;
+        try {
+            const response = await fetch(`/api/clusters/${currentSheet}?${params.toString()}`);
+            if (!response.ok) throw new Error(`API error ${response.status}: ${response.statusText}`);
+            result = await response.json();
+        } catch (error) {
+            console.error(`Failed to load clusters for ${currentSheet}:`, error);
+            return;
+        }
+        if (requestId !== filterRequestId) return;
+        const layerGroup = L.layerGroup();
+        result.clusters.forEach(cluster => {
+            const sizeClass = cluster.count < 10 ? 'small' : cluster.count < 100 ? 'medium' : 'large';
+            const icon = L.divIcon({ html: `<div><span>${cluster.count}</span></div>`, className: `marker-cluster marker-cluster-${sizeClass}`, iconSize: L.point(40, 40) });
+            L.marker([cluster.lat, cluster.lon], { icon }).on('click', () => map.setView([cluster.lat, cluster.lon], map.getZoom() + 2)).addTo(layerGroup);
+        });
+        result.points.forEach(item => {
             const options = getStyleForItem(item);
             const marker = options.icon ? L.marker([item.Latitude, item.Longitude], options) : L.circleMarker([item.Latitude, item.Longitude], options);
-            marker.bindPopup(createPopupContent(item));
-            clusterLayerGroup.addLayer(marker);
+            marker.bindPopup(createPopupContent(item)).addTo(layerGroup);
         });
+        clearAllLayers();
+        clusterLayerGroup = layerGroup;
         map.addLayer(clusterLayerGroup);
     }
 
@@ -363,35 +502,33 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    function displayAnalytics(filteredData) {
+    // Analytics come from the server-side rollups (/api/aggregate) for the same filters as the map.
+    let analyticsRequestId = 0;
+    async function displayAnalytics() {
+        const requestId = ++analyticsRequestId;
+        try {
+            const response = await fetch(`/api/aggregate/${currentSheet}?${buildFilterQuery().toString()}`);
+            if (!response.ok) throw new Error(`API error ${response.status}: ${response.statusText}`);
+            const aggregate = await response.json();
+            if (requestId === analyticsRequestId) renderAnalytics(aggregate);
+        } catch (error) {
+            console.error(`Failed to load analytics for ${currentSheet}:`, error);
+            if (requestId === analyticsRequestId) renderAnalytics(null);
+        }
+    }
+
+    function renderAnalytics(aggregate) {
         const container = document.getElementById('analytics-container');
-        if (filteredData.length === 0) {
+        if (!aggregate || aggregate.total === 0) {
             container.innerHTML = '<p>No data to display.</p>'; return;
         }
-        const countBy = (key) => filteredData.reduce((acc, item) => {
-            const itemKey = item[key] || "Unknown";
-            acc[itemKey] = (acc[itemKey] || 0) + 1;
-            return acc;
-        }, {});
         const topThree = (counts) => Object.entries(counts).sort(([, a], [, b]) => b - a).slice(0, 3).map(([name, count]) => `<li>${name}: <strong>${count}</strong></li>`).join('');
 
-        let crimeTypeKey, locationKey;
-        if (currentSheet === 'Robbrey-theft') {
-            crimeTypeKey = 'CrimeType';
-            locationKey = 'Subdivision';
-        } else if (currentSheet === 'Hurt' || currentSheet === 'POCSO') {
-            crimeTypeKey = 'SubCategory';
-            locationKey = 'Subdivision';
-        } else {
-            crimeTypeKey = 'EventType';
-            locationKey = 'Subdivision';
-        }
-
-        const crimeCounts = countBy(crimeTypeKey);
-        const locationCounts = countBy(locationKey);
+        const crimeCounts = (currentSheet === 'Hurt' || currentSheet === 'POCSO') ? aggregate.by_sub_category : aggregate.by_type;
+        const locationCounts = aggregate.by_subdivision;
         let html = `
-            <p><strong>Total Cases in View:</strong> ${filteredData.length}</p>
-            ${Object.keys(crimeCounts).length > 1 && crimeTypeKey ? `<h4>Top Types:</h4><ul>${topThree(crimeCounts)}</ul>` : ''}
+            <p><strong>Total Cases in View:</strong> ${aggregate.total}</p>
+            ${Object.keys(crimeCounts).length > 1 ? `<h4>Top Types:</h4><ul>${topThree(crimeCounts)}</ul>` : ''}
             ${Object.keys(locationCounts).length > 1 ? `<h4>Top Locations:</h4><ul>${topThree(locationCounts)}</ul>` : ''}
         `;
         container.innerHTML = html;
@@ -0,0 +1,142 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+import Levenshtein
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_station_key(messy_station):
+    """Lookup key used for PS_ALIAS_MAP: lowercase, dots and 'ps' removed."""
+    return str(messy_station).lower().replace('.', '').replace('ps', '').strip()
+
+
+class StationResolver:
+    """
+    Resolves messy police-station names to canonical station keys.
+    - Raw strings are memoized in a bounded LRU, so recurring spellings cost one dict lookup.
+    - Fuzzy matching only scores stations whose length is within the match radius (prebuilt length buckets).
+    - Fuzzy hits are learned back into the alias map; manual aliases can be added with learn().
+    """
+
+    def __init__(self, alias_map, master_list, sdo_abbreviation_map, threshold=80, cache_size=None):
+        """
+        Args:
+            alias_map (dict): normalized key -> station key. Learned aliases are added to this dict.
+            master_list (list): Canonical station keys, in priority order for equally close matches.
+            sdo_abbreviation_map (dict): SDO abbreviation -> subdivision, used for the SDO fallback.
+            threshold (int): Minimum similarity percentage for a fuzzy match.
+            cache_size (int): Max raw strings kept in the LRU.
+        """
+        self.alias_map = alias_map
+        self.master_list = list(master_list)
+        self.sdo_abbreviation_map = sdo_abbreviation_map
+        self.threshold = threshold
+        self.cache_size = cache_size or int(os.environ.get('STATION_RESOLVER_CACHE_SIZE', 4096))
+        self._rank = {station: i for i, station in enumerate(self.master_list)}
+        self._by_length = {}
+        for station in self.master_list:
+            self._by_length.setdefault(len(station), []).append(station)
+        self._cache = OrderedDict()
+        self._learned = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.fuzzy_lookups = 0
+
+    def resolve(self, messy_station, sdo_fallback=None):
+        """Same contract as the original standardize_police_station."""
+        if not messy_station: return None
+        raw = str(messy_station)
+        with self._lock:
+            if raw in self._cache:
+                self._cache.move_to_end(raw)
+                self.hits += 1
+                key, station = self._cache[raw]
+            else:
+                self.misses += 1
+                key, station = None, None
+        if key is None:
+            key = normalize_station_key(raw)
+            station = self._lookup(key)
+            with self._lock:
+                self._cache[raw] = (key, station)
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if station: return station
+        if sdo_fallback and self.sdo_abbreviation_map.get(key.upper()) == sdo_fallback:
+            return sdo_fallback.lower().replace(" ", "")
+        return None
+
+    def _lookup(self, key):
+        exact_match = self.alias_map.get(key)
+        if exact_match: return exact_match
+        fuzzy_match = self.best_match(key)
+        if fuzzy_match:
+            with self._lock:
+                self.alias_map.setdefault(key, fuzzy_match)
+                self._learned.setdefault(key, {"station": fuzzy_match, "source": "fuzzy"})
+        return fuzzy_match
+
+    def best_match(self, key):
+        """
+        Closest master station by Levenshtein distance (earliest in master_list on ties),
+        or None if it is below the similarity threshold.
+        """
+        if not key: return None
+        self.fuzzy_lookups += 1
+        # An accepted station satisfies |len(key) - len(station)| <= distance <= (1 - t) * max(len(key), len(station)),
+        # which bounds distance by (1 - t) / t * len(key). Anything outside that radius cannot be the answer.
+        # (Integer arithmetic plus one for float rounding; extra candidates are rejected by the check below.)
+        radius = (100 - self.threshold) * len(key) // self.threshold + 1
+        distance, best = radius + 1, None
+        for length in range(max(0, len(key) - radius), len(key) + radius + 1):
+            for station in self._by_length.get(length, ()):
+                # Distance never drops below the length difference, and score_cutoff stops early past the best so far
+                d = Levenshtein.distance(key, station, score_cutoff=distance)
+                if d < distance or (d == distance and best is not None and self._rank[station] < self._rank[best]):
+                    distance, best = d, station
+        if best is None: return None
+        max_len = max(len(key), len(best))
+        if max_len == 0: return best
+        similarity = (1 - (distance / max_len)) * 100
+        return best if similarity >= self.threshold else None
+
+    def learn(self, alias, station, source="manual"):
+        """Maps `alias` (any spelling) to a canonical station and drops memoized results."""
+        if station not in self._rank:
+            raise ValueError(f"Unknown station '{station}'")
+        key = normalize_station_key(alias)
+        if not key:
+            raise ValueError("Alias is empty")
+        with self._lock:
+            self.alias_map[key] = station
+            self._learned[key] = {"station": station, "source": source}
+            self._cache.clear()
+        logger.info(f"Learned station alias '{key}' -> '{station}' ({source}).")
+        return key
+
+    def load(self, aliases, source="stored"):
+        """Adds already-normalized {key: station} aliases, e.g. ones persisted by an earlier run."""
+        with self._lock:
+            for key, station in aliases.items():
+                if station in self._rank:
+                    self.alias_map[key] = station
+                    self._learned[key] = {"station": station, "source": source}
+            self._cache.clear()
+
+    def learned(self):
+        with self._lock:
+            return dict(self._learned)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached": len(self._cache),
+                "cache_size": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "fuzzy_lookups": self.fuzzy_lookups,
+                "learned_aliases": len(self._learned),
+            }
@@ -0,0 +1,147 @@
+import os
+import json
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Per-subdivision boundary files in static/geojson and the names used by PS_TO_SUBDIVISION_MAP
+SUBDIVISION_FILES = {
+    "thoothukuditown.geojson": "Thoothukudi Town",
+    "thoothukudirural.geojson": "Thoothukudi Rural",
+    "maniyachi.geojson": "Maniyachi",
+    "kovilpatti.geojson": "Kovilpatti",
+    "vilathikulam.geojson": "Vilathikulam",
+    "srivaikundam.geojson": "Srivaikundam",
+    "tiruchendur.geojson": "Tiruchendur",
+    "sathankulam.geojson": "Sathankulam",
+}
+OUTSIDE, BOUNDARY = -1, -2
+
+
+def polygon_edges(geometry):
+    """All ring edges of a (Multi)Polygon as an (n, 4) array of lon0, lat0, lon1, lat1."""
+    polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+    edges = []
+    for polygon in polygons:
+        for ring in polygon:
+            points = np.asarray(ring, dtype=float)[:, :2]
+            edges.append(np.hstack([points[:-1], points[1:]]))
+    return np.vstack(edges)
+
+
+class SubdivisionLocator:
+    """
+    Point -> police subdivision from the bundled boundary polygons.
+    At load, a grid over the district is filled by scanline: each cell is either wholly inside one subdivision,
+    outside all of them, or crossed by a boundary. Points in the first two kinds are answered by one array lookup;
+    only points in boundary cells get an exact even-odd ray test, against the subdivisions whose bbox contains them.
+    """
+
+    def __init__(self, directory=None, files=None, grid_size=None):
+        self.directory = directory or os.environ.get('SUBDIVISION_GEOJSON_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'geojson'))
+        self.grid_size = grid_size or int(os.environ.get('SUBDIVISION_GRID_SIZE', 256))
+        self.names, self.edges, self.bboxes = [], [], []
+        for filename, name in (files or SUBDIVISION_FILES).items():
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    features = json.load(f)["features"]
+                edges = np.vstack([polygon_edges(feature["geometry"]) for feature in features])
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                logger.error(f"Could not load subdivision boundary {filename}: {e}")
+                continue
+            self.names.append(name)
+            self.edges.append(edges)
+            self.bboxes.append((min(edges[:, 0].min(), edges[:, 2].min()), min(edges[:, 1].min(), edges[:, 3].min()),
+                                max(edges[:, 0].max(), edges[:, 2].max()), max(edges[:, 1].max(), edges[:, 3].max())))
+        self._labels = np.array(self.names + [None], dtype=object)  # index -1 (outside) -> None
+        self._build_grid()
+        logger.info(f"Subdivision locator ready: {len(self.names)} subdivisions, {self.grid_size}x{self.grid_size} grid, "
+                    f"{self.boundary_cells} boundary cells.")
+
+    def _build_grid(self):
+        n = self.grid_size
+        self.grid = np.full((n, n), OUTSIDE, dtype=np.int16)
+        self.boundary_cells = 0
+        if not self.names:
+            self.min_lon = self.min_lat = 0.0
+            self.cell_lon = self.cell_lat = 1.0
+            self._grid_rows = self.grid.tolist()
+            return
+        self.min_lon = min(b[0] for b in self.bboxes)
+        self.min_lat = min(b[1] for b in self.bboxes)
+        self.cell_lon = (max(b[2] for b in self.bboxes) - self.min_lon) / n
+        self.cell_lat = (max(b[3] for b in self.bboxes) - self.min_lat) / n
+        centers_lon = self.min_lon + (np.arange(n) + 0.5) * self.cell_lon
+        centers_lat = self.min_lat + (np.arange(n) + 0.5) * self.cell_lat
+        # Scanline fill: along each row, cell centers with an odd number of edge crossings to their left are inside
+        for index, edges in enumerate(self.edges):
+            lon0, lat0, lon1, lat1 = edges.T
+            for row, lat in enumerate(centers_lat):
+                crosses = (lat0 > lat) != (lat1 > lat)
+                if not crosses.any(): continue
+                xs = np.sort(lon0[crosses] + (lat - lat0[crosses]) * (lon1[crosses] - lon0[crosses]) / (lat1[crosses] - lat0[crosses]))
+                inside = np.searchsorted(xs, centers_lon) % 2 == 1
+                self.grid[row, inside] = index
+        # Any cell an edge passes through needs the exact test
+        for edges in self.edges:
+            cols = ((edges[:, [0, 2]] - self.min_lon) / self.cell_lon).astype(int).clip(0, n - 1)
+            rows = ((edges[:, [1, 3]] - self.min_lat) / self.cell_lat).astype(int).clip(0, n - 1)
+            for (c0, c1), (r0, r1) in zip(np.sort(cols, axis=1), np.sort(rows, axis=1)):
+                self.grid[r0:r1 + 1, c0:c1 + 1] = BOUNDARY
+        self.boundary_cells = int((self.grid == BOUNDARY).sum())
+        self._grid_rows = self.grid.tolist()  # Plain lists for the scalar path
+
+    def locate(self, lat, lon):
+        """Subdivision containing (lat, lon), or None."""
+        try:
+            col = math.floor((lon - self.min_lon) / self.cell_lon)
+            row = math.floor((lat - self.min_lat) / self.cell_lat)
+        except (TypeError, ValueError):
+            return None
+        if not (0 <= row < self.grid_size and 0 <= col < self.grid_size): return None
+        index = self._grid_rows[row][col]
+        if index == BOUNDARY:
+            index = OUTSIDE
+            for candidate, (min_lon, min_lat, max_lon, max_lat) in enumerate(self.bboxes):
+                if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat and self._contains(candidate, np.array([lat]), np.array([lon]))[0]:
+                    index = candidate
+                    break
+        return self._labels[index]
+
+    def locate_many(self, lats, lons):
+        """Vectorised locate(): returns a list of names/None for arrays of coordinates (NaN allowed)."""
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        result = np.full(len(lats), OUTSIDE, dtype=np.int16)
+        with np.errstate(invalid='ignore'):
+            cols = np.floor((lons - self.min_lon) / self.cell_lon)
+            rows = np.floor((lats - self.min_lat) / self.cell_lat)
+        in_grid = (cols >= 0) & (cols < self.grid_size) & (rows >= 0) & (rows < self.grid_size)
+        result[in_grid] = self.grid[rows[in_grid].astype(int), cols[in_grid].astype(int)]
+        pending = np.flatnonzero(result == BOUNDARY)
+        result[pending] = OUTSIDE
+        for candidate, (min_lon, min_lat, max_lon, max_lat) in enumerate(self.bboxes):
+            if not len(pending): break
+            lat, lon = lats[pending], lons[pending]
+            in_bbox = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+            hits = pending[in_bbox][self._contains(candidate, lat[in_bbox], lon[in_bbox])]
+            result[hits] = candidate
+            pending = np.setdiff1d(pending, hits, assume_unique=True)
+        return self._labels[result].tolist()
+
+    def _contains(self, index, lats, lons):
+        """Even-odd ray test of points against every ring of one subdivision."""
+        lon0, lat0, lon1, lat1 = (column[None, :] for column in self.edges[index].T)
+        lats, lons = lats[:, None], lons[:, None]
+        crosses = (lat0 > lats) != (lat1 > lats)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = lon0 + (lats - lat0) * (lon1 - lon0) / (lat1 - lat0)
+        return ((crosses & (lons < x)).sum(axis=1) % 2) == 1
+
+    def stats(self):
+        return {"subdivisions": self.names, "grid_size": self.grid_size, "boundary_cells": self.boundary_cells}
+
+
+# Singleton instance
+subdivision_locator = SubdivisionLocator()
@@ -0,0 +1,57 @@
+import os
+import logging
+import random
+import tempfile
+
+os.environ.setdefault("INCIDENT_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+import app
+from sheet_schema import schema_for
+
+COORDS = ["8.79123", "78.13456", "9.41", "77.61", "", "9", "78", " 8.7 ", "8.", ".5", "8.7N", "8.71, 78.12",
+          "78.12,8.71", "85000000000000000.0", "0.00001", "abc", "8.7.1", "+8.7", "1e1", "8.7e0"]
+HEADERS = {
+    "100_calls": app.DISPATCH_HEADER + ["SDOs"],
+    "robbery_theft": ["Date", "Police Station", "Station", "SDOs", "Description", "Latitude", "Longitude"],
+    "hurt": ["Occurance Mon", "SDO", "PS Limit", "Crime Type", "Lat", "Long"],
+    "pocso": ["DescriptionE", "SDOs", "PS Limit", "Description - Real /Elopment", "Lat, Long"],
+    "cctv": ["Name of the place", "SDO", "Status", "Latitude", "Longitude"],
+}
+
+
+def random_cell(rng, name):
+    lower = name.lower()
+    if "lat" in lower or "lon" in lower: return rng.choice(COORDS)
+    if name in ("Date", "Occurance Mon", "DescriptionE"): return rng.choice(["18-10-2026", "2026-10-18", "45000", "", "bad"])
+    if name in ("Police Station", "Station"): return rng.choice(list(app.PS_TO_SUBDIVISION_MAP)[:20] + ["Unknown PS", "kovilpati", "", "12"])
+    if name in ("SDO", "SDOs"): return rng.choice(list(app.SDO_ABBREVIATION_MAP) + ["1. TTN", "Tut Rural", "", "xx"])
+    if name.startswith("Event"): return rng.choice(["Theft", "fire", "", "Road accident x", "7"])
+    return rng.choice(["", "x", "grevious", "Elopement case", " ", "5"])
+
+
+class Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_batch_cleaning_matches_rowwise():
+    rng = random.Random(7)
+    recorder = Recorder()
+    app.skipped_rows_logger.addHandler(recorder)
+    try:
+        for record_type, header in HEADERS.items():
+            rows = [[random_cell(rng, name) for name in header][:rng.randint(0, len(header) + 1)] for _ in range(1500)]
+            schema = schema_for(header)
+            recorder.messages = []
+            rowwise = app.process_records_rowwise(schema, rows, record_type)
+            rowwise_log, recorder.messages = recorder.messages, []
+            batch = app.process_records_batch(schema, rows, record_type)
+            assert batch == rowwise, record_type
+            assert recorder.messages == rowwise_log, record_type
+            assert rowwise[1]["processed_successfully"] > 0 and rowwise_log
+    finally:
+        app.skipped_rows_logger.removeHandler(recorder)
@@ -0,0 +1,63 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from data_query import DatasetIndex, parse_query, run_query
+
+ROWS = [
+    {"Date": "2024-01-03", "EventType": "Theft", "Subdivision": "Town", "Latitude": 8.76, "Longitude": 78.13},
+    {"Date": "2024-01-01", "EventType": "Fire", "Subdivision": "Rural", "Latitude": 8.80, "Longitude": 78.05},
+    {"Date": None, "EventType": "Theft", "Subdivision": "Town", "Latitude": 9.17, "Longitude": 77.87},
+    {"Date": "2024-01-02", "CrimeType": "Theft", "Subdivision": "Kovilpatti", "Latitude": 9.17, "Longitude": 77.87},
+    {"Date": "2024-01-05", "EventType": "Theft, minor", "Subdivision": "Town", "Latitude": 8.77, "Longitude": 78.14},
+]
+
+
+def query(**args):
+    kwargs = parse_query(MultiDict(args))
+    return run_query(DatasetIndex(ROWS), {"f": 1}, **kwargs)
+
+
+def test_parse_query_defaults_and_lists():
+    assert parse_query(MultiDict()) == {"date_from": None, "date_to": None, "subdivisions": None, "types": None,
+                                        "sub_categories": None, "bbox": None, "limit": None, "cursor": None, "fields": None}
+    kwargs = parse_query(MultiDict([("types", "Theft, minor"), ("types", " Fire "), ("subdivisions", ""), ("limit", "0")]))
+    assert kwargs["types"] == ["Theft, minor", "Fire"]
+    assert kwargs["subdivisions"] == []  # present but empty matches nothing
+    assert kwargs["limit"] == 0
+
+
+@pytest.mark.parametrize("args", [
+    {"bbox": "78,8,79"},
+    {"bbox": "78,8,79,9,10"},
+    {"bbox": "a,b,c,d"},
+    {"limit": "-1"},
+    {"limit": "ten"},
+    {"cursor": "next"},
+])
+def test_parse_query_rejects_bad_input(args):
+    with pytest.raises(ValueError):
+        parse_query(MultiDict(args))
+
+
+def test_run_query_filters():
+    assert [r["Date"] for r in query(**{"from": "2024-01-02", "to": "2024-01-03"})["data"]] == ["2024-01-03", "2024-01-02"]
+    assert query(types="Theft")["total"] == 3  # EventType or CrimeType
+    assert query(subdivisions="Town", types="Theft, minor")["data"] == [ROWS[4]]
+    assert query(bbox="78.0,8.7,78.2,8.9")["total"] == 3
+    assert query(subdivisions="")["total"] == 0
+    result = query(fields="Date")
+    assert result["data"][0] == {"Date": "2024-01-03"} and result["filters"] == {"f": 1}
+
+
+def test_run_query_pages_with_cursor():
+    seen, cursor = [], None
+    while True:
+        args = {"limit": "2", **({"cursor": str(cursor)} if cursor is not None else {})}
+        page = query(**args)
+        assert page["total"] == len(ROWS)
+        seen += page["data"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ROWS
+    assert query(limit="0")["data"] == [] and query(limit="0")["total"] == len(ROWS)
@@ -0,0 +1,68 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+import http_cache
+from http_cache import EncodedPayload, derived_etag, encoded_for, not_modified, send_json, send_payload
+
+PAYLOAD = {"data": [{"id": i, "text": "x" * 20} for i in range(100)], "filters": {}}
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/payload")
+    def payload():
+        return send_payload(encoded_for("Hurt", 1, PAYLOAD))
+
+    @app.route("/query")
+    def query():
+        etag = derived_etag("Hurt", 1)
+        return not_modified(etag) or send_json({"data": PAYLOAD["data"][:2]}, etag)
+
+    yield app.test_client()
+    http_cache._encoded.clear()
+
+
+def test_payload_is_compressed_and_revalidates(client):
+    response = client.get("/payload", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200 and response.content_encoding == "gzip"
+    assert json.loads(gzip.decompress(response.data)) == PAYLOAD
+    etag = response.headers["ETag"]
+    assert client.get("/payload", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304
+    # The identity representation has its own tag
+    plain = client.get("/payload", headers={"Accept-Encoding": "identity"})
+    assert plain.content_encoding is None and plain.headers["ETag"] != etag
+    assert json.loads(plain.data) == PAYLOAD
+    assert "no-cache" in plain.headers["Cache-Control"] and "Accept-Encoding" in plain.headers["Vary"]
+
+
+def test_derived_etag_tracks_query_arguments(client):
+    first = client.get("/query?types=A&types=B")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/query?types=A&types=B&refresh=1", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/query?types=B&types=A", headers={"If-None-Match": etag}).status_code == 304  # sorted
+    assert client.get("/query?types=A", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_not_modified_matches_any_encoding():
+    app = Flask(__name__)
+    with app.test_request_context("/query", headers={"If-None-Match": '"abc-br"'}):
+        assert not_modified("abc").status_code == 304
+        assert not_modified("abd") is None
+
+
+def test_encoded_payload_is_reused_per_version():
+    app = Flask(__name__)
+    with app.app_context():
+        encoded = encoded_for("Cctv", 1, PAYLOAD)
+        assert encoded_for("Cctv", 1, {"other": True}) is encoded
+        assert encoded_for("Cctv", 2, PAYLOAD) is not encoded
+        assert encoded.etag == EncodedPayload(encoded.body).etag
+        assert gzip.decompress(encoded.variant("gzip")) == encoded.body
+        assert encoded.variant("gzip") is encoded.variant("gzip")
+    http_cache._encoded.clear()
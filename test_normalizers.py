@@ -0,0 +1,96 @@
+import os
+import random
+import re
+import tempfile
+
+os.environ.setdefault("INCIDENT_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+import Levenshtein
+from dateutil.parser import parse as parse_date, ParserError
+
+import app
+from date_normalizer import DateNormalizer
+from station_resolver import StationResolver
+
+
+# --- Reference implementations: the original standardize_police_station / standardize_date ---
+# (reference_date also catches OverflowError, which the original let escape from the row loop)
+def reference_station(messy_station, sdo_fallback=None, threshold=80):
+    if not messy_station: return None
+    key = str(messy_station).lower().replace('.', '').replace('ps', '').strip()
+    exact_match = app.PS_ALIAS_MAP.get(key)
+    if exact_match: return exact_match
+    best_match, min_distance = None, float('inf')
+    if key:
+        for station in app.MASTER_STATION_LIST:
+            distance = Levenshtein.distance(key, station.lower())
+            if distance < min_distance: min_distance, best_match = distance, station
+    if best_match:
+        max_len = max(len(key), len(best_match))
+        if (1 - (min_distance / max_len)) * 100 >= threshold: return best_match
+    if sdo_fallback and app.SDO_ABBREVIATION_MAP.get(key.upper()) == sdo_fallback:
+        return sdo_fallback.lower().replace(" ", "")
+    return None
+
+
+def reference_date(date_string):
+    if not date_string: return None
+    cleaned = str(date_string).strip().lower()
+    if cleaned in ['between', 'after', 'before']: return None
+    match = re.search(r'\d{1,2}[\.\/-]\d{1,2}[\.\/-]\d{2,4}', cleaned)
+    date_to_parse = match.group(0) if match else cleaned
+    try: return parse_date(date_to_parse, dayfirst=True, fuzzy=False).strftime('%Y-%m-%d')
+    except (ValueError, TypeError, ParserError, OverflowError):
+        try: return parse_date(date_to_parse, dayfirst=True, fuzzy=True).strftime('%Y-%m-%d')
+        except (ValueError, TypeError, ParserError, OverflowError): return None
+
+
+def mutate(rng, word):
+    chars = list(word)
+    for _ in range(rng.randint(0, 5)):
+        i = rng.randint(0, max(len(chars) - 1, 0))
+        op = rng.random()
+        if op < 0.33 and chars: del chars[i]
+        elif op < 0.66: chars.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz .'))
+        elif chars: chars[i] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+    text = ''.join(chars)
+    return text.upper() if rng.random() < 0.2 else text
+
+
+def test_station_resolver_matches_reference():
+    rng = random.Random(1)
+    resolver = StationResolver(dict(app.PS_ALIAS_MAP), app.MASTER_STATION_LIST, app.SDO_ABBREVIATION_MAP, cache_size=64)
+    words = list(app.PS_ALIAS_MAP) + ['vkm', 'skm', 'tut', 'xyz', '', 'P.S. North', 'kovilpati east ps']
+    for _ in range(3000):
+        messy = mutate(rng, rng.choice(words))
+        sdo = rng.choice([None, 'Vilathikulam', 'Thoothukudi Town'])
+        assert resolver.resolve(messy, sdo) == reference_station(messy, sdo), (messy, sdo)
+    assert resolver.stats()["hits"] > 0 and resolver.learned()
+
+
+def random_date(rng):
+    day, month = rng.randint(0, 35), rng.randint(0, 35)
+    year = rng.choice([str(rng.randint(0, 99)).zfill(rng.choice([1, 2])), str(rng.randint(1900, 2030)), '0012', '202'])
+    sep = rng.choice('-/.')
+    sep2 = rng.choice(['-', '/', '.', sep, sep])
+    r = rng.random()
+    if r < 0.6: return f"{day:0{rng.choice([1, 2])}d}{sep}{month:0{rng.choice([1, 2])}d}{sep2}{year}"
+    if r < 0.8: return f"{rng.choice(['', ' ', 'DT '])}{day}{sep}{month}{sep2}{year}{rng.choice(['', ' 10:30', ' pm'])}"
+    return rng.choice(['Between', 'after ', '12 March 2024', 'March 5', '2024-03-05', '05-Mar-2024', '', 'garbage',
+                       '5/3/24 to 7/3/24', 'on 05.03.2024 at 10pm', 'Date: 1/1/19', None, 0, 12, 5.3])
+
+
+def test_date_normalizer_matches_reference():
+    rng = random.Random(3)
+    normalizer = DateNormalizer(cache_size=256)
+    for _ in range(5000):
+        value = random_date(rng)
+        assert normalizer.normalize(value) == reference_date(value), value
+    assert normalizer.stats()["paths"]["fast_dmy"]["count"] > 0
+
+
+def test_date_normalizer_reads_spreadsheet_serials():
+    normalizer = DateNormalizer()
+    assert normalizer.normalize("45000") == "2023-03-15"
+    assert normalizer.normalize("45000.0") == "2023-03-15"
+    assert normalizer.normalize("12345") == reference_date("12345")  # outside 2000-2099: dateutil as before
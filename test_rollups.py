@@ -0,0 +1,24 @@
+from rollups import rollup_for
+
+
+def record(subdivision, event_type, date):
+    return {"Subdivision": subdivision, "EventType": event_type, "Date": date}
+
+
+def test_appended_rows_extend_previous_cube():
+    rows = [record("Town", "Theft", "2024-01-01"), record("Rural", "Fire", "2024-01-02")]
+    assert rollup_for("appended", 1, rows).query()["total"] == 2
+    grown = rows + [record("Town", "Fire", "2024-01-03")]
+    result = rollup_for("appended", 2, grown).query()
+    assert result["total"] == 3
+    assert result["by_subdivision"] == {"Town": 2, "Rural": 1}
+
+
+def test_edited_earlier_row_rebuilds_cube():
+    tail = record("Rural", "Fire", "2024-01-02")
+    rows = [record("Town", "Theft", "2024-01-01"), tail]
+    rollup_for("edited", 1, rows)
+    # A reload that rebuilt the first row (edited) but reused the last one must not be treated as append-only
+    reloaded = [record("Kovilpatti", "Theft", "2024-01-01"), tail]
+    result = rollup_for("edited", 2, reloaded).query()
+    assert result["by_subdivision"] == {"Kovilpatti": 1, "Rural": 1}
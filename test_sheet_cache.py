@@ -0,0 +1,92 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sheet_cache import SheetCache
+from sheet_sync import SyncPayload
+
+
+def failing_loader():
+    raise RuntimeError("Sheets unavailable")
+
+
+def test_failed_refresh_keeps_cached_copy():
+    cache = SheetCache(ttl_seconds=60)
+    cache.get("Hurt", lambda: {"data": [1, 2], "filters": {}})
+    with pytest.raises(RuntimeError):
+        cache.refresh("Hurt", failing_loader)
+    assert cache.get("Hurt", failing_loader) == {"data": [1, 2], "filters": {}}
+    assert cache.peek("Hurt").version == 1
+
+
+def test_empty_tab_is_cached_like_any_result():
+    cache = SheetCache(ttl_seconds=60)
+    cache.get("Hurt", lambda: {"data": [1, 2], "filters": {}})
+    assert cache.refresh("Hurt", lambda: {"data": [], "filters": {}}) == {"data": [], "filters": {}}
+    assert cache.peek("Hurt").version == 2
+    assert cache.get("Hurt", failing_loader)["data"] == []
+
+
+def sync_payload(rows, revision):
+    payload = SyncPayload(data=rows, filters={})
+    payload.revision = revision
+    return payload
+
+
+def test_older_sync_revision_never_replaces_newer():
+    cache = SheetCache(ttl_seconds=60)
+    cache.get("100_calls_new", lambda: sync_payload(["a"], 1))
+    # A live dispatch (revision 3) lands while a refresh built from revision 2 is still running
+    assert cache.patch("100_calls_new", sync_payload(["a", "b", "live"], 3)).version == 2
+    assert cache.refresh("100_calls_new", lambda: sync_payload(["a", "b"], 2))["data"] == ["a", "b", "live"]
+    # ...and the other way round: a patch built before the cached sync is dropped
+    cache.refresh("100_calls_new", lambda: sync_payload(["a", "b", "c", "live"], 5))
+    assert cache.patch("100_calls_new", sync_payload(["a", "b", "live"], 4)).value["data"] == ["a", "b", "c", "live"]
+    assert cache.patch("100_calls_new", {"data": ["stale seed", "live"], "filters": {}}).version == 3
+
+
+def test_stale_copy_is_served_while_one_background_refresh_runs():
+    cache = SheetCache(ttl_seconds=60)
+    cache.seed("Hurt", {"data": ["old"], "filters": {}})
+    release, calls = threading.Event(), []
+
+    def slow_loader():
+        calls.append(1)
+        release.wait(5)
+        return {"data": ["new"], "filters": {}}
+
+    assert cache.get("Hurt", slow_loader)["data"] == ["old"]
+    assert cache.get("Hurt", slow_loader)["data"] == ["old"]  # joins the refresh already running
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.peek("Hurt").version < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("Hurt", failing_loader)["data"] == ["new"]  # fresh now: no further load
+    assert calls == [1]
+
+
+def test_concurrent_misses_share_one_load():
+    cache = SheetCache(ttl_seconds=60)
+    release, calls = threading.Event(), []
+
+    def slow_loader():
+        calls.append(1)
+        release.wait(5)
+        return {"data": [1], "filters": {}}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = [pool.submit(cache.get, "Hurt", slow_loader) for _ in range(4)]
+        time.sleep(0.1)
+        release.set()
+        assert [r.result()["data"] for r in results] == [[1]] * 4
+    assert calls == [1] and cache.peek("Hurt").version == 1
+
+
+def test_failed_first_load_raises_and_caches_nothing():
+    cache = SheetCache(ttl_seconds=60)
+    with pytest.raises(RuntimeError):
+        cache.get("Hurt", failing_loader)
+    assert cache.peek("Hurt") is None
+    assert cache.get("Hurt", lambda: {"data": [1], "filters": {}})["data"] == [1]
@@ -0,0 +1,65 @@
+from sheet_sync import IncrementalSheetSync
+
+HEADER = ["Date", "EventType"]
+
+
+def process(header, rows, record_type, first_row_num=0):
+    return [{"Date": row[0], "EventType": row[1], "Subdivision": "Town"} for row in rows if any(row)]
+
+
+def build_filters(acc):
+    return {"event_types": sorted(acc["event_types"])}
+
+
+class FakeWorksheet:
+    """Mimics gspread: get_all_values() for the full sheet, get('A<n>:<col>') for the rows from n on."""
+
+    def __init__(self, rows):
+        self.values = [HEADER] + rows
+
+    def get_all_values(self):
+        return [list(r) for r in self.values]
+
+    def get(self, range_name):
+        start = int(range_name.split(":")[0][1:])
+        rows = [list(r) for r in self.values[start - 1:]]
+        return rows or [[]]  # gspread returns [[]] for an empty range
+
+
+def test_idle_incremental_sync_does_not_advance():
+    sheet = FakeWorksheet([["2024-01-01", "A"], ["2024-01-02", "B"]])
+    sync = IncrementalSheetSync("test", process, build_filters, reconcile_seconds=3600)
+    sync.sync(sheet)
+    for _ in range(3):
+        sync.sync(sheet)
+    assert sync.rows_synced == 2
+
+    sheet.values += [["2024-01-03", "C"], ["2024-01-04", "D"]]
+    payload = sync.sync(sheet)
+    assert sync.rows_synced == 4
+    assert [item["EventType"] for item in payload["data"]] == ["A", "B", "C", "D"]
+
+
+def test_blank_rows_between_appends_keep_positions():
+    sheet = FakeWorksheet([["2024-01-01", "A"]])
+    sync = IncrementalSheetSync("test", process, build_filters, reconcile_seconds=3600)
+    sync.sync(sheet)
+    sheet.values += [["", ""], ["2024-01-02", "B"]]
+    sync.sync(sheet)
+    sheet.values += [["2024-01-03", "C"]]
+    payload = sync.sync(sheet)
+    assert sync.rows_synced == 4
+    assert [item["EventType"] for item in payload["data"]] == ["A", "B", "C"]
+
+
+def test_sync_of_empty_tab_retries_full_sync():
+    sheet = FakeWorksheet([])
+    sheet.values = []  # Not even a header row yet
+    sync = IncrementalSheetSync("test", process, build_filters, reconcile_seconds=3600)
+    assert sync.sync(sheet) == {"data": [], "filters": {}}
+    assert sync.sync(sheet) == {"data": [], "filters": {}}
+
+    sheet.values = [HEADER, ["2024-01-01", "A"]]
+    payload = sync.sync(sheet)
+    assert sync.rows_synced == 1
+    assert [item["EventType"] for item in payload["data"]] == ["A"]
@@ -0,0 +1,24 @@
+from spatial_index import grid_for
+
+
+def point(lat, lon):
+    return {"Latitude": lat, "Longitude": lon}
+
+
+def cell_totals(grid, zoom=8):
+    return sorted((count, round(sum_lat / count, 4)) for count, sum_lat, _, _ in grid.levels[zoom].values())
+
+
+def test_appended_rows_extend_grid():
+    rows = [point(8.7, 78.0), point(8.8, 78.1)]
+    grid_for("appended", 1, rows)
+    grid = grid_for("appended", 2, rows + [point(9.2, 77.9)])
+    assert grid.row_count == 3
+    assert sum(count for count, *_ in grid.levels[8].values()) == 3
+
+
+def test_edited_earlier_row_rebuilds_grid():
+    tail = point(8.8, 78.1)
+    grid_for("edited", 1, [point(8.7, 78.0), tail])
+    grid = grid_for("edited", 2, [point(9.2, 77.9), tail])
+    assert cell_totals(grid) == cell_totals(grid_for("fresh", 1, [point(9.2, 77.9), point(8.8, 78.1)]))
@@ -0,0 +1,103 @@
+from incident_store import IncidentStore
+from write_behind import WriteBehindQueue
+
+
+class Rejected(Exception):
+    pass
+
+
+class FakeSheet:
+    """flush_fn stand-in: rejects any batch containing a row marked 'bad'."""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = []
+
+    def append(self, rows, verify=False):
+        self.calls.append((len(rows), verify))
+        if any(row[0] == "bad" for row in rows):
+            raise Rejected("400 INVALID_ARGUMENT")
+        self.rows += [row[0] for row in rows]
+
+
+def make_queue(tmp_path, sheet, **kwargs):
+    store = IncidentStore(str(tmp_path / "store.db"))
+    queue = WriteBehindQueue(store, sheet.append, batch_size=10, is_rejection_fn=lambda e: isinstance(e, Rejected),
+                             max_rejections=2, **kwargs)
+    return store, queue
+
+
+def drain(queue, rounds=20):
+    for _ in range(rounds):
+        queue.flush_once()
+
+
+def test_rejected_row_is_dead_lettered_and_unblocks_the_queue(tmp_path):
+    sheet = FakeSheet()
+    store, queue = make_queue(tmp_path, sheet)
+    for value in ["a", "bad", "b"]:
+        store.add_dispatch([value], {})
+    drain(queue)
+    assert sheet.rows == ["a", "b"]
+    assert store.pending_summary()[0] == 0
+    status = queue.status()
+    assert status["dead_lettered"] == 1 and status["dead_letter_depth"] == 1
+    assert status["dead_letters"][0]["sheet_row"] == ["bad"]
+
+
+def test_outage_is_retried_without_dead_lettering(tmp_path):
+    sheet = FakeSheet()
+    store, queue = make_queue(tmp_path, sheet)
+    store.add_dispatch(["a"], {})
+    outage = [True] * 5
+
+    def flaky(rows, verify=False):
+        if outage and outage.pop():
+            raise ConnectionError("Sheets unavailable")
+        sheet.append(rows, verify)
+
+    queue.flush_fn = flaky
+    drain(queue, rounds=6)
+    assert sheet.rows == ["a"]
+    assert store.dead_letter_count() == 0
+
+
+def test_first_flush_and_the_one_after_a_failure_verify(tmp_path):
+    sheet = FakeSheet()
+    store, queue = make_queue(tmp_path, sheet)
+    outage = []
+
+    def flaky(rows, verify=False):
+        sheet.append(rows, verify)
+        if outage and outage.pop():
+            raise ConnectionError("timed out after the append landed")
+
+    queue.flush_fn = flaky
+    for value, fails in [("a", False), ("b", False), ("c", True), ("d", False)]:
+        store.add_dispatch([value], {})
+        outage.append(fails)
+        drain(queue, rounds=2)
+    # After a restart and after the failure, the flush must check for rows that already reached the sheet
+    assert sheet.calls == [(1, True), (1, False), (1, False), (1, True), (1, False)]
+    assert store.pending_summary()[0] == 0
+
+
+def test_backoff_grows_to_the_cap_and_resets(tmp_path):
+    sheet = FakeSheet()
+    store, queue = make_queue(tmp_path, sheet, max_backoff_seconds=8)
+    store.add_dispatch(["a"], {})
+
+    def down(rows, verify=False):
+        raise ConnectionError("Sheets unavailable")
+
+    queue.flush_fn = down
+    backoffs = []
+    for _ in range(8):
+        assert not queue.flush_once()
+        backoffs.append(queue._backoff)
+    assert 0.8 <= backoffs[0] <= 1.2
+    assert all(b <= 8 * 1.2 for b in backoffs) and backoffs[-1] >= 8 * 0.8
+    assert store.pending_summary()[0] == 1 and queue.status()["failed_batches"] == 8
+    queue.flush_fn = sheet.append
+    assert queue.flush_once()
+    assert queue._backoff == 0 and sheet.calls == [(1, True)]
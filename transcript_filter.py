@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Words are runs of letters/digits plus Indic combining signs (Tamil vowel signs are not \w)
+TOKEN_RE = re.compile(r"(?:\w|[\u0900-\u0DFF])+")
+MATCH_MODES = ("word", "whole")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class TranscriptFilter:
+    """
+    Blocks junk/hallucinated transcripts using rules from a JSON file (see transcript_filters.json).
+    Rule fields:
+    - id: name reported when the rule fires.
+    - phrases: matched on word boundaries, case-insensitive.
+    - match: "word" (phrase appears anywhere as whole words) or "whole" (the transcript is nothing but the phrase).
+    - patterns: optional regexes, for anything the phrase forms cannot express.
+    - languages: optional list of detected_language values the rule applies to (default: all).
+    Phrases are looked up by word n-gram in a dict, so matching cost depends on the transcript length, not the list size.
+    The file is re-read when its mtime changes; a broken file keeps the previous rules.
+    """
+
+    def __init__(self, path=None, reload_seconds=None):
+        self.path = path or os.environ.get('TRANSCRIPT_FILTER_FILE', 'transcript_filters.json')
+        self.reload_seconds = reload_seconds if reload_seconds is not None else float(os.environ.get('TRANSCRIPT_FILTER_RELOAD_SECONDS', 5))
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._rules = []
+        self._compiled = {}  # language key -> (word phrases, whole phrases, pattern regex, regex group -> rule, longest phrase)
+        self.hits = Counter()
+        self.checked = 0
+        self.loaded_at = None
+        self.load_error = None
+        self._maybe_reload(force=True)
+
+    def match(self, text, language=None):
+        """
+        Returns {"rule", "phrase"} for the first rule that fires on `text`, or None.
+        """
+        self._maybe_reload()
+        words, whole, pattern, pattern_rules, longest = self._for_language(language)
+        tokens = tokenize(text)
+        hit = None
+        if tokens:
+            rule = whole.get(" ".join(tokens))
+            if rule: hit = {"rule": rule, "phrase": " ".join(tokens)}
+        if hit is None and words:
+            for start in range(len(tokens)):
+                for size in range(1, min(longest, len(tokens) - start) + 1):
+                    phrase = " ".join(tokens[start:start + size])
+                    rule = words.get(phrase)
+                    if rule:
+                        hit = {"rule": rule, "phrase": phrase}
+                        break
+                if hit: break
+        if hit is None and pattern is not None:
+            m = pattern.search(text)
+            if m: hit = {"rule": pattern_rules[m.lastgroup], "phrase": m.group(0)}
+        with self._lock:
+            self.checked += 1
+            if hit: self.hits[hit["rule"]] += 1
+        return hit
+
+    def _for_language(self, language):
+        key = (language or "").lower()
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                compiled = self._compiled[key] = self._compile(key)
+            return compiled
+
+    def _compile(self, language):
+        words, whole, patterns, pattern_rules = {}, {}, [], {}
+        for index, rule in enumerate(self._rules):
+            if rule["languages"] and language not in rule["languages"]: continue
+            table = whole if rule["match"] == "whole" else words
+            for phrase in rule["phrases"]:
+                table.setdefault(phrase, rule["id"])
+            for n, p in enumerate(rule["patterns"]):
+                group = f"r{index}_{n}"
+                patterns.append(f"(?P<{group}>{p})")
+                pattern_rules[group] = rule["id"]
+        # All of a language's regexes run as one alternation; the named group tells which rule fired
+        pattern = re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+        longest = max((len(phrase.split()) for phrase in words), default=0)
+        return words, whole, pattern, pattern_rules, longest
+
+    def _maybe_reload(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_seconds: return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if force: logger.warning(f"Transcript filter file {self.path} not readable ({e}); no rules loaded.")
+            return
+        if mtime == self._mtime: return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rules = [self._parse_rule(rule) for rule in json.load(f)["rules"]]
+            for rule in rules:
+                for p in rule["patterns"]: re.compile(p)
+        except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+            self._mtime = mtime  # Don't retry the same broken file on every call
+            self.load_error = str(e)
+            logger.error(f"Invalid transcript filter file {self.path}: {e}. Keeping previous rules.")
+            return
+        with self._lock:
+            self._rules, self._compiled, self._mtime = rules, {}, mtime
+            self.loaded_at, self.load_error = time.time(), None
+        logger.info(f"Loaded {len(rules)} transcript filter rules from {self.path}.")
+
+    @staticmethod
+    def _parse_rule(rule):
+        mode = rule.get("match", "word")
+        if mode not in MATCH_MODES:
+            raise ValueError(f"rule {rule.get('id')!r}: match must be one of {MATCH_MODES}")
+        return {
+            "id": str(rule["id"]),
+            "match": mode,
+            "phrases": [" ".join(tokenize(p)) for p in rule.get("phrases", []) if tokenize(p)],
+            "patterns": list(rule.get("patterns", [])),
+            "languages": [str(lang).lower() for lang in rule.get("languages", [])],
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "source": self.path,
+                "loaded_at": self.loaded_at,
+                "load_error": self.load_error,
+                "checked": self.checked,
+                "rules": [{"id": r["id"], "match": r["match"], "phrases": len(r["phrases"]), "patterns": len(r["patterns"]),
+                           "languages": r["languages"] or "all", "hits": self.hits[r["id"]]} for r in self._rules],
+            }
+
+
+# Singleton instance
+transcript_filter = TranscriptFilter()
@@ -0,0 +1,166 @@
+import os
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Cache identity of a phrase: NFC, surrounding/duplicate whitespace removed. Case and punctuation are kept (they change prosody)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TTSCache:
+    """
+    Two-tier cache of synthesized speech.
+    - Memory: LRU bounded by total bytes.
+    - Disk: content-addressed files <dir>/<hash[:2]>/<hash>.mp3 that survive restarts and are shared by workers.
+      Bounded by total bytes too (on Cloud Run the filesystem is RAM): least recently used files are deleted,
+      with recency kept in file mtimes so it survives restarts. Each worker enforces the cap on what it sees.
+    Keys hash the normalized text with the voice settings, so a voice change never serves stale audio.
+    """
+
+    def __init__(self, directory=None, memory_bytes=None, disk_bytes=None):
+        self.directory = directory or os.environ.get('TTS_CACHE_DIR', 'tts_cache')
+        self.memory_bytes = memory_bytes if memory_bytes is not None else int(os.environ.get('TTS_CACHE_MEMORY_BYTES', 32 * 1024 * 1024))
+        self.disk_bytes = disk_bytes if disk_bytes is not None else int(os.environ.get('TTS_CACHE_DISK_BYTES', 64 * 1024 * 1024))
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = self.disk_hits = self.misses = self.disk_errors = self.disk_evictions = 0
+        self._disk, self._disk_size = self._scan_disk()  # key -> size, least recently used first
+        self._evict_disk()
+
+    @staticmethod
+    def key(text, target_lang, voice_name, audio_profile):
+        raw = "\x1f".join((target_lang, voice_name, audio_profile, normalize_text(text)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _scan_disk(self):
+        """Index of the files already on disk, ordered by mtime (oldest first)."""
+        found = []
+        try:
+            for entry in os.scandir(self.directory):
+                if not entry.is_dir(): continue
+                for f in os.scandir(entry.path):
+                    if f.name.endswith(".mp3"):
+                        stat = f.stat()
+                        found.append((stat.st_mtime, f.name[:-4], stat.st_size))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"TTS cache scan of {self.directory} failed: {e}")
+        found.sort()
+        return OrderedDict((key, size) for _, key, size in found), sum(size for _, _, size in found)
+
+    def get(self, key):
+        """Returns cached MP3 bytes or None."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            audio = None
+        except OSError as e:
+            logger.warning(f"TTS cache read failed for {key}: {e}")
+            audio = None
+        with self._lock:
+            if audio:
+                self.disk_hits += 1
+                self._remember(key, audio)
+                self._touch_disk(key, len(audio))
+            else:
+                self.misses += 1
+        if audio:
+            try:
+                os.utime(self._path(key))  # Recency for the next process's scan
+            except OSError:
+                pass
+        return audio
+
+    def put(self, key, audio):
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)  # Atomic, so readers never see a partial file
+        except OSError as e:
+            with self._lock:
+                self.disk_errors += 1
+            logger.warning(f"TTS cache write failed for {key}: {e}")
+            return
+        with self._lock:
+            self._touch_disk(key, len(audio))
+            self._evict_disk()
+
+    def contains(self, key):
+        with self._lock:
+            if key in self._memory:
+                return True
+        return os.path.exists(self._path(key))
+
+    def _remember(self, key, audio):
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _touch_disk(self, key, size):
+        """Marks `key` as most recently used on disk (lock held)."""
+        previous = self._disk.pop(key, None)
+        if previous is not None:
+            self._disk_size -= previous
+        self._disk[key] = size
+        self._disk_size += size
+
+    def _evict_disk(self):
+        """Deletes least recently used files until the disk tier fits its budget (lock held)."""
+        while self._disk_size > self.disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass  # Already evicted by another worker
+            except OSError as e:
+                logger.warning(f"TTS cache eviction failed for {key}: {e}")
+            self.disk_evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_size,
+                "disk_evictions": self.disk_evictions,
+                "disk_errors": self.disk_errors,
+            }
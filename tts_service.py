@@ -1,15 +1,45 @@
 import os
+import re
 import json
 import base64
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import texttospeech
 from google.oauth2 import service_account
+from tts_cache import TTSCache
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries (Latin and Devanagari danda); short fragments are merged into the previous sentence
+SENTENCE_BREAK = re.compile(r'(?<=[.!?\u0964])\s+')
+MIN_SEGMENT_CHARS = 40
+# Part of every cache key: bump when the AudioConfig below changes
+AUDIO_PROFILE = "mp3@1.0"
+
+def voice_for(language_code):
+    """Maps the AI's detected language to (Cloud TTS language code, voice name)."""
+    # Ensure these match available voices
+    if language_code == "Tamil":
+        return "ta-IN", "ta-IN-Wavenet-D" # Female (Better quality)
+    if language_code == "Tanglish":
+        return "ta-IN", "ta-IN-Wavenet-D" # Use Tamil voice for Tanglish
+    return "en-IN", "en-IN-Wavenet-C" # Default English (Female)
+
+def split_sentences(text):
+    """Splits text into sentence-sized segments that can be synthesized independently."""
+    segments = []
+    for part in SENTENCE_BREAK.split(text.strip()):
+        if segments and len(segments[-1]) < MIN_SEGMENT_CHARS:
+            segments[-1] = f"{segments[-1]} {part}"
+        elif part:
+            segments.append(part)
+    return segments
+
 class TTSService:
     def __init__(self):
         self.client = None
+        self.executor = ThreadPoolExecutor(max_workers=int(os.environ.get('TTS_WORKERS', 4)), thread_name_prefix="tts")
+        self.cache = TTSCache()
         self._initialize_client()
 
     def _initialize_client(self):
@@ -42,26 +72,38 @@ class TTSService:
         Generates audio from text using Google Cloud TTS.
         Returns base64 encoded audio string (MP3).
         """
-        if not self.client:
-            logger.error("TTS Client not initialized.")
-            return None
+        audio = self.synthesize(text, language_code)
+        return base64.b64encode(audio).decode("utf-8") if audio else None
 
+    def synthesize_async(self, text, language_code="en-IN"):
+        """
+        Starts synthesizing `text` sentence by sentence on the TTS pool.
+        Returns one Future per segment, in speaking order; each resolves to MP3 bytes (or None on failure).
+        The first sentence is usually ready well before the whole text would be.
+        """
+        if not text:
+            return []
+        return [self.executor.submit(self.synthesize, segment, language_code) for segment in split_sentences(text)]
+
+    def synthesize(self, text, language_code="en-IN"):
+        """
+        Generates audio from text using Google Cloud TTS.
+        Returns the raw MP3 bytes, from the phrase cache when this text was spoken before in the same voice.
+        """
         if not text:
             return None
 
+        target_lang, voice_name = voice_for(language_code)
+        cache_key = self.cache.key(text, target_lang, voice_name, AUDIO_PROFILE)
+        cached = self.cache.get(cache_key)
+        if cached:
+            return cached
+
+        if not self.client:
+            logger.error("TTS Client not initialized.")
+            return None
+
         try:
-            # Map detect language to Google Cloud TTS language codes
-            # Ensure these match available voices
-            target_lang = "en-IN"
-            voice_name = "en-IN-Wavenet-C" # Default English (Female)
-
-            if language_code == "Tamil":
-                target_lang = "ta-IN"
-                voice_name = "ta-IN-Wavenet-D" # Female (Better quality)
-            elif language_code == "Tanglish":
-                target_lang = "ta-IN" # Use Tamil voice for Tanglish
-                voice_name = "ta-IN-Wavenet-D"
-            
             # Prepare synthesis input
             synthesis_input = texttospeech.SynthesisInput(text=text)
 
@@ -82,12 +124,33 @@ class TTSService:
                 input=synthesis_input, voice=voice, audio_config=audio_config
             )
 
-            # Return the binary audio content as base64 string
-            return base64.b64encode(response.audio_content).decode("utf-8")
+            self.cache.put(cache_key, response.audio_content)
+            return response.audio_content
 
         except Exception as e:
             logger.error(f"Error generating TTS: {e}")
             return None
 
+    def prewarm(self, path=None):
+        """
+        Synthesizes every phrase of a {language: [phrases]} JSON file that is not cached yet.
+        Sentences are cached individually, matching how responses are synthesized.
+        """
+        path = path or os.environ.get('TTS_PREWARM_FILE', 'tts_prewarm.json')
+        if not self.client or not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            phrases = json.load(f)
+        pending = []
+        for language_code, texts in phrases.items():
+            target_lang, voice_name = voice_for(language_code)
+            for text in texts:
+                for segment in split_sentences(text):
+                    if not self.cache.contains(self.cache.key(segment, target_lang, voice_name, AUDIO_PROFILE)):
+                        pending.append(self.executor.submit(self.synthesize, segment, language_code))
+        warmed = sum(1 for future in pending if future.result())
+        logger.info(f"TTS cache prewarmed with {warmed} new phrases from {path}.")
+        return warmed
+
 # Singleton instance for import
 tts_service = TTSService()
@@ -0,0 +1,125 @@
+import io
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Optional: PyAV decodes WebM/Opus in-process and numpy does the frame analysis. Without them every chunk goes to the model.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import av
+except ImportError:
+    av = None
+
+SPEECH_BAND_HZ = (100, 4000)  # Voice fundamentals through the formants; excludes mains hum and rumble
+
+
+class VoiceActivityDetector:
+    """
+    Local speech check run before a chunk is sent to Gemini.
+    The chunk is decoded to 16 kHz mono PCM and cut into short frames; a frame counts as voiced when its
+    energy, zero-crossing rate and share of energy in the speech band all pass their thresholds.
+    The chunk is rejected when too few frames are voiced. Anything that cannot be decoded is let through.
+    """
+
+    def __init__(self, enabled=None, energy_dbfs=None, zcr_max=None, speech_band_min=None, min_speech_ratio=None, sample_rate=16000, frame_ms=30):
+        self.enabled = enabled if enabled is not None else os.environ.get('VAD_ENABLED', 'true').lower() == 'true'
+        self.energy_dbfs = energy_dbfs if energy_dbfs is not None else float(os.environ.get('VAD_ENERGY_DBFS', -45))
+        self.zcr_max = zcr_max if zcr_max is not None else float(os.environ.get('VAD_ZCR_MAX', 0.35))
+        self.speech_band_min = speech_band_min if speech_band_min is not None else float(os.environ.get('VAD_SPEECH_BAND_MIN', 0.5))
+        self.min_speech_ratio = min_speech_ratio if min_speech_ratio is not None else float(os.environ.get('VAD_MIN_SPEECH_RATIO', 0.1))
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * frame_ms // 1000
+        self._lock = threading.Lock()
+        self.checked = self.speech = self.rejected = self.undecodable = self.unavailable = 0
+        self.total_ms = 0.0
+        if self.enabled and not self.available:
+            logger.warning("Voice activity detection disabled: PyAV/numpy not installed.")
+
+    @property
+    def available(self):
+        return av is not None and np is not None
+
+    def check(self, audio):
+        """
+        Args:
+            audio (bytes-like): One complete WebM chunk.
+        Returns:
+            dict: {speech: True/False, or None when undecided, probability, ms}.
+        """
+        if not self.enabled or not self.available:
+            with self._lock: self.unavailable += 1
+            return {"speech": None, "probability": None, "ms": 0.0}
+        started = time.perf_counter()
+        try:
+            probability = self.speech_probability(self.decode(audio))
+        except Exception as e:
+            ms = round((time.perf_counter() - started) * 1000, 2)
+            with self._lock: self.undecodable += 1
+            logger.warning(f"VAD could not decode audio chunk ({e}); sending it to the model.")
+            return {"speech": None, "probability": None, "ms": ms}
+        speech = probability >= self.min_speech_ratio
+        ms = round((time.perf_counter() - started) * 1000, 2)
+        with self._lock:
+            self.checked += 1
+            self.total_ms += ms
+            if speech: self.speech += 1
+            else: self.rejected += 1
+        return {"speech": speech, "probability": round(probability, 3), "ms": ms}
+
+    def decode(self, audio):
+        """WebM/Opus bytes -> float32 mono PCM in [-1, 1] at `sample_rate`."""
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=self.sample_rate)
+        pcm = []
+        with av.open(io.BytesIO(audio), mode='r') as container:
+            for frame in container.decode(audio=0):
+                pcm.extend(out.to_ndarray() for out in resampler.resample(frame))
+            pcm.extend(out.to_ndarray() for out in resampler.resample(None))  # Flush
+        if not pcm:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(pcm, axis=None).astype(np.float32) / 32768.0
+
+    def speech_probability(self, samples):
+        """Share of frames that look like speech."""
+        n = self.frame_length
+        count = len(samples) // n
+        if count == 0:
+            return 0.0
+        frames = samples[:count * n].reshape(count, n)
+        dbfs = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (n - 1)
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(n), axis=1)) ** 2
+        freqs = np.fft.rfftfreq(n, 1 / self.sample_rate)
+        band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+        band_ratio = spectrum[:, band].sum(axis=1) / (spectrum.sum(axis=1) + 1e-12)
+        voiced = (dbfs > self.energy_dbfs) & (zcr < self.zcr_max) & (band_ratio > self.speech_band_min)
+        return float(voiced.mean())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "available": self.available,
+                "checked": self.checked,
+                "speech": self.speech,
+                "model_calls_saved": self.rejected,
+                "undecodable": self.undecodable,
+                "not_checked": self.unavailable,
+                "avg_ms": round(self.total_ms / self.checked, 2) if self.checked else None,
+                "thresholds": {
+                    "energy_dbfs": self.energy_dbfs,
+                    "zcr_max": self.zcr_max,
+                    "speech_band_min": self.speech_band_min,
+                    "min_speech_ratio": self.min_speech_ratio,
+                },
+            }
+
+
+# Singleton instance
+voice_activity = VoiceActivityDetector()
@@ -0,0 +1,134 @@
+import os
+import time
+import random
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Drains dispatches journaled in the IncidentStore to Google Sheets in the background.
+    Rows are sent in batches; failures back off exponentially and stay journaled until they succeed.
+    A failed append may still have reached the sheet, so the batch after a failure (and the first one after
+    a restart) is flushed with verify=True and the flush function skips rows that are already there.
+    When Sheets rejects a batch outright, its rows are retried one at a time; a row rejected on its own
+    `max_rejections` times is dead-lettered so it stops blocking the rows queued behind it.
+    """
+
+    def __init__(self, store, flush_fn, batch_size=None, max_backoff_seconds=None, poll_seconds=None,
+                 is_rejection_fn=None, max_rejections=None):
+        """
+        Args:
+            store (IncidentStore): Durable journal of pending dispatches.
+            flush_fn (callable): flush_fn(rows, verify) appends sheet rows remotely, skipping rows already
+                present when `verify` is set; raises on failure.
+            is_rejection_fn (callable): is_rejection_fn(error) -> True if the rows themselves were refused
+                (retrying unchanged cannot succeed). Other errors are retried indefinitely.
+            max_rejections (int): Rejections of a row sent alone before it is dead-lettered.
+        """
+        self.store = store
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size or int(os.environ.get('DISPATCH_QUEUE_BATCH_SIZE', 50))
+        self.max_backoff_seconds = max_backoff_seconds or float(os.environ.get('DISPATCH_QUEUE_MAX_BACKOFF_SECONDS', 60))
+        self.poll_seconds = poll_seconds or float(os.environ.get('DISPATCH_QUEUE_POLL_SECONDS', 30))
+        self.is_rejection_fn = is_rejection_fn or (lambda error: False)
+        self.max_rejections = max_rejections or int(os.environ.get('DISPATCH_QUEUE_MAX_REJECTIONS', 3))
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._backoff = 0
+        self._verify_next = True
+        self._isolate_through = None  # While set, rows up to this id are sent one per batch
+        self.metrics = {
+            "flushed_total": 0,
+            "failed_batches": 0,
+            "dead_lettered": 0,
+            "last_flush_at": None,
+            "last_flush_seconds": None,
+            "last_flush_lag_seconds": None,
+            "last_error": None,
+        }
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="dispatch-write-behind", daemon=True)
+        self._thread.start()
+        logger.info("Dispatch write-behind queue started.")
+
+    def notify(self):
+        """Wakes the worker after a new dispatch has been journaled."""
+        self._wakeup.set()
+
+    def status(self):
+        depth, oldest = self.store.pending_summary()
+        return {
+            "depth": depth,
+            "oldest_pending_age_seconds": round(time.time() - oldest, 1) if oldest else None,
+            "backoff_seconds": round(self._backoff, 1),
+            **self.metrics,
+            "dead_letter_depth": self.store.dead_letter_count(),
+            "dead_letters": self.store.dead_letters(),
+        }
+
+    def _run(self):
+        while True:
+            try:
+                flushed = self.flush_once()
+            except Exception as e:
+                logger.error(f"Write-behind worker error: {e}", exc_info=True)
+                flushed = False
+            if self._backoff:
+                time.sleep(self._backoff)
+            elif not flushed:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+
+    def flush_once(self):
+        """Sends one batch of pending rows. Returns True if the queue moved on (a batch mirrored or a row dead-lettered)."""
+        pending = self.store.pending_dispatches(limit=self.batch_size)
+        if self._isolate_through is not None:
+            if pending and pending[0][0] <= self._isolate_through:
+                pending = pending[:1]
+            else:
+                self._isolate_through = None
+        if not pending:
+            self._backoff = 0
+            return False
+        ids = [dispatch_id for dispatch_id, _, _ in pending]
+        started = time.time()
+        try:
+            self.flush_fn([row for _, _, row in pending], verify=self._verify_next)
+        except Exception as e:
+            self._verify_next = True
+            self.store.mark_failed(ids, e)
+            self.metrics["failed_batches"] += 1
+            self.metrics["last_error"] = str(e)
+            if self.is_rejection_fn(e):
+                if len(ids) > 1:
+                    # Likely one bad row: find it by sending the rows of this batch one at a time
+                    self._isolate_through = ids[-1]
+                elif self.store.mark_rejected(ids[0], self.max_rejections):
+                    self.metrics["dead_lettered"] += 1
+                    self._backoff = 0
+                    logger.error(f"Dispatch {ids[0]} was rejected by Sheets {self.max_rejections} times and is dead-lettered: {e}")
+                    return True
+            # Exponential backoff with jitter, capped
+            self._backoff = min(self.max_backoff_seconds, max(1.0, self._backoff * 2)) * random.uniform(0.8, 1.2)
+            logger.warning(f"Mirroring {len(ids)} dispatch(es) failed: {e}. Retrying in {self._backoff:.1f}s.")
+            return False
+
+        finished = time.time()
+        self.store.mark_mirrored(ids)
+        self._backoff = 0
+        self._verify_next = False
+        self.metrics.update({
+            "flushed_total": self.metrics["flushed_total"] + len(ids),
+            "last_flush_at": finished,
+            "last_flush_seconds": round(finished - started, 3),
+            "last_flush_lag_seconds": round(finished - min(created for _, created, _ in pending), 3),
+            "last_error": None,
+        })
+        logger.info(f"Mirrored {len(ids)} dispatch(es) to Google Sheets in {finished - started:.2f}s.")
+        return True